@@ -1,10 +1,14 @@
+from pathlib import Path
+
 from setuptools import setup, find_packages
 
+long_description = Path(__file__).with_name("README.md").read_text(encoding="utf-8")
+
 setup(
     name="WrapSlurm",
     version="0.1.10",
     description="A utility for managing SLURM jobs and nodes with enhanced display features.",
-    long_description=open("README.md").read(),
+    long_description=long_description,
     long_description_content_type="text/markdown",
     author="Voidful",
     author_email="voidful@eric-lam.com",
@@ -12,7 +16,6 @@ setup(
     license="MIT",
     packages=find_packages(),
     install_requires=[
-        "terminaltables",
         "termcolor",
         "questionary",
     ],
@@ -0,0 +1,53 @@
+import subprocess
+import wrapslurm.cancel_job as cj
+
+
+def test_cancel_jobs_batches_ids(monkeypatch, capsys):
+    calls = []
+
+    def fake_run(cmd, check=False, **_kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    monkeypatch.setattr(cj.subprocess, "run", fake_run)
+    assert cj.cancel_jobs(["1", "2", "3"], signal="SIGINT") == 0
+    assert calls == [["scancel", "--signal", "SIGINT", "1", "2", "3"]]
+    assert "1 2 3" in capsys.readouterr().out
+
+
+def test_cancel_jobs_chunks_large_lists(monkeypatch):
+    calls = []
+
+    def fake_run(cmd, check=False, **_kwargs):
+        calls.append(cmd)
+        return subprocess.CompletedProcess(cmd, 0, stderr="")
+
+    monkeypatch.setattr(cj.subprocess, "run", fake_run)
+    monkeypatch.setattr(cj, "CHUNK", 2)
+    assert cj.cancel_jobs(["1", "2", "3"]) == 0
+    assert calls == [["scancel", "1", "2"], ["scancel", "3"]]
+
+
+def test_cancel_jobs_reports_failed_id(monkeypatch, capsys):
+    calls = []
+
+    def fake_run(cmd, check=False, **_kwargs):
+        calls.append(cmd)
+        stderr = "scancel: error: Kill job error on job id 2: Invalid job id specified\n"
+        return subprocess.CompletedProcess(cmd, 1, stderr=stderr)
+
+    monkeypatch.setattr(cj.subprocess, "run", fake_run)
+    assert cj.cancel_jobs(["1", "2"], signal="SIGUSR1") == 1
+    out = capsys.readouterr().out
+    assert calls == [["scancel", "--signal", "SIGUSR1", "1", "2"]]
+    assert "Cancelled jobs: 1\n" in out
+    assert "Failed to cancel job 2: Invalid job id specified" in out
+
+
+def test_cancel_jobs_reports_unattributed_error(monkeypatch, capsys):
+    def fake_run(cmd, check=False, **_kwargs):
+        return subprocess.CompletedProcess(cmd, 1, stderr="scancel: error: Invalid user name: nobody\n")
+
+    monkeypatch.setattr(cj.subprocess, "run", fake_run)
+    assert cj.cancel_jobs(["1", "2"], user="nobody") == 1
+    assert "Failed to cancel jobs 1 2: scancel: error: Invalid user name: nobody" in capsys.readouterr().out
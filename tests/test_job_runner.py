@@ -0,0 +1,407 @@
+import dataclasses
+import functools
+import io
+
+import pytest
+
+import wrapslurm.cache as cache
+import wrapslurm.job_runner as jr
+
+SINFO_OUTPUT = """gpux|64|191997|gpu:8|2-00:00:00
+gpux|32|95000|gpu:4|2-00:00:00
+cpu|128|515000|(null)|4-00:00:00
+"""
+
+
+@pytest.fixture(autouse=True)
+def cache_path(monkeypatch, tmp_path):
+    path = str(tmp_path / "slurm_meta.json")
+    monkeypatch.setattr(jr, "load_cached", functools.partial(jr.load_cached, path=path))
+    monkeypatch.setattr(jr, "save_cached", functools.partial(jr.save_cached, path=path))
+    for var in jr.ACCOUNT_ENV_VARS:
+        monkeypatch.delenv(var, raising=False)
+    memoized = (jr.query_partition_resources, jr.get_default_account)
+    for func in memoized:
+        func.cache_clear()
+    yield path
+    for func in memoized:
+        func.cache_clear()
+
+
+def _config(**overrides):
+    fields = dict(
+        nodes=1, partition="gpux", account="acct", tasks_per_node=1, cpus_per_task=8,
+        memory="32G", gpus=1, time="1:00:00", report_dir="./logs", command=["python", "train.py"],
+    )
+    fields.update(overrides)
+    return jr.JobConfig(**fields)
+
+
+class FakePopen:
+    """Minimal stand-in for subprocess.Popen that replays canned stdout."""
+
+    def __init__(self, cmd, output="", returncode=0):
+        self.args = cmd
+        self.stdout = io.BytesIO(output.encode())
+        self.returncode = returncode
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def _fake_sinfo(monkeypatch, output=SINFO_OUTPUT, returncode=0):
+    calls = []
+
+    def fake_popen(cmd, **_kwargs):
+        calls.append(cmd)
+        return FakePopen(cmd, output, returncode)
+
+    monkeypatch.setattr(jr.subprocess, "Popen", fake_popen)
+    return calls
+
+
+def test_query_partition_resources_uses_cache(monkeypatch):
+    calls = _fake_sinfo(monkeypatch)
+
+    partitions = jr.query_partition_resources()
+    assert partitions["gpux"].cpus_per_node == 64
+    assert partitions["gpux"].gpus == 8
+    assert partitions["cpu"].memory_mb == 515000
+    assert jr.query_partition_resources() == partitions
+    assert len(calls) == 1
+
+    jr.query_partition_resources(refresh=True)
+    assert len(calls) == 2
+
+
+def test_partition_cache_is_kept_per_cluster(monkeypatch):
+    calls = _fake_sinfo(monkeypatch)
+    monkeypatch.setattr(jr, "cluster_key", lambda key: "alpha/" + key)
+    jr.query_partition_resources()
+    jr.query_partition_resources.cache_clear()
+    monkeypatch.setattr(jr, "cluster_key", lambda key: "beta/" + key)
+    jr.query_partition_resources()
+    assert len(calls) == 2
+
+
+def test_cluster_id_reads_cluster_name_from_slurm_conf(monkeypatch, tmp_path):
+    conf = tmp_path / "slurm.conf"
+    conf.write_text("# cluster\nclustername=alpha  # site A\nSlurmctldHost=ctl\n")
+    monkeypatch.delenv("SLURM_CLUSTERS", raising=False)
+    monkeypatch.setenv("SLURM_CONF", str(conf))
+    cache.cluster_id.cache_clear()
+    try:
+        assert cache.cluster_key("partitions") == "alpha/partitions"
+        monkeypatch.setenv("SLURM_CLUSTERS", "beta")
+        cache.cluster_id.cache_clear()
+        assert cache.cluster_id() == "beta"
+    finally:
+        cache.cluster_id.cache_clear()
+
+
+def test_sinfo_rows_with_socket_affinity_and_cpu_states(monkeypatch):
+    _fake_sinfo(monkeypatch, output="a100|16/48/0/64|515000+|gpu:a100:8(S:0-1)|infinite\nbad row\n")
+    partitions = jr.query_partition_resources()
+    assert list(partitions) == ["a100"]
+    assert partitions["a100"].cpus_per_node == 64
+    assert partitions["a100"].memory_mb == 515000
+    assert partitions["a100"].gpus == 8
+    assert partitions["a100"].max_time == "infinite"
+
+
+def test_query_partition_resources_stale_fallback(monkeypatch, capsys):
+    _fake_sinfo(monkeypatch)
+    partitions = jr.query_partition_resources()
+
+    _fake_sinfo(monkeypatch, output="", returncode=1)
+    assert jr.query_partition_resources(refresh=True) == partitions
+    assert "cached by a previous run" in capsys.readouterr().out
+
+
+def test_cache_file_parsed_once_until_modified(monkeypatch, tmp_path):
+    path = str(tmp_path / "meta.json")
+    cache.save_cached("account:alice", "proj", path=path)
+    loads = []
+    real_load = cache.json.load
+    monkeypatch.setattr(cache.json, "load", lambda f: loads.append(f) or real_load(f))
+
+    assert cache.load_cached("account:alice", path=path) == "proj"
+    assert cache.load_cached("partitions", path=path) is None
+    assert loads == []
+
+    with open(path, "w", encoding="utf-8") as cache_file:
+        cache_file.write('{"partitions": {"timestamp": 0, "payload": {}}}\n')
+    assert cache.load_cached("partitions", path=path) == {}
+    assert len(loads) == 1
+
+
+def test_save_user_defaults_merges_preloaded(tmp_path):
+    path = str(tmp_path / "config" / "defaults.json")
+    jr.save_user_defaults({"partition": "gpux"}, path=path)
+    defaults = jr.load_user_defaults(path)
+    jr.save_user_defaults({"nodes": 2}, path=path, defaults=defaults)
+    assert jr.load_user_defaults(path) == {"partition": "gpux", "nodes": 2}
+    assert defaults == {"partition": "gpux"}
+
+
+def test_collect_default_updates_skips_unset_and_unknown():
+    args = jr.build_parser().parse_args(["-p", "gpux", "-N", "2", "--dry-run"])
+    assert jr.collect_default_updates(args) == {"partition": "gpux", "nodes": 2}
+
+
+def test_resolve_job_config_skips_slurm_queries_when_fully_specified(monkeypatch):
+    def fail(*_args, **_kwargs):
+        raise AssertionError("SLURM should not be queried")
+
+    monkeypatch.setattr(jr, "query_partition_resources", fail)
+    monkeypatch.setattr(jr, "get_default_account", fail)
+    args = jr.build_parser().parse_args([
+        "-p", "gpux", "-A", "acct", "-N", "1", "-n", "1", "-c", "8",
+        "--mem", "32G", "-G", "1", "-t", "1:00:00", "python", "train.py",
+    ])
+    config, auto_fields, default_fields, _ = jr.resolve_job_config(args, {}, use_defaults=True)
+    assert config.partition == "gpux"
+    assert config.account == "acct"
+    assert auto_fields == []
+    assert default_fields == []
+
+
+def test_resolve_job_config_auto_detects_from_partitions(monkeypatch):
+    _fake_sinfo(monkeypatch)
+    monkeypatch.setattr(jr, "get_default_account", lambda refresh=False: "acct")
+    args = jr.build_parser().parse_args(["python", "train.py"])
+    config, auto_fields, _, _ = jr.resolve_job_config(args, {}, use_defaults=True)
+    assert config.partition == "cpu"
+    assert config.cpus_per_task == 128
+    assert config.time == "4-00:00:00"
+    assert config.account == "acct"
+    assert "partition" in auto_fields and "account" in auto_fields
+
+
+def test_resolve_job_config_offline_uses_placeholders(monkeypatch):
+    def fail(*_args, **_kwargs):
+        raise AssertionError("SLURM should not be queried offline")
+
+    monkeypatch.setenv(jr.OFFLINE_ENV, "1")
+    monkeypatch.setattr(jr, "query_partition_resources", fail)
+    monkeypatch.setattr(jr, "get_default_account", fail)
+    args = jr.build_parser().parse_args(["--dry-run", "python", "train.py"])
+    assert jr.prefetch_slurm_metadata(args, {}, executor=None) == (None, None)
+
+    config, auto_fields, _, _ = jr.resolve_job_config(args, {}, use_defaults=True)
+    assert config.partition == jr.OFFLINE_PARTITION
+    assert config.account == jr.OFFLINE_ACCOUNT
+    assert config.cpus_per_task == 1
+    assert "partition" in auto_fields and "account" in auto_fields
+
+
+def test_named_dry_run_still_reads_partition_limits(monkeypatch):
+    _fake_sinfo(monkeypatch)
+    monkeypatch.setattr(jr, "get_default_account", lambda refresh=False: pytest.fail("account was given"))
+    args = jr.build_parser().parse_args(["--dry-run", "-p", "cpu", "-A", "acct", "python", "train.py"])
+    assert jr.skip_slurm_queries() is False
+
+    config, auto_fields, _, _ = jr.resolve_job_config(args, {}, use_defaults=True)
+    assert config.cpus_per_task == 128
+    assert config.time == "4-00:00:00"
+    assert "account" not in auto_fields
+
+
+def test_build_sbatch_script():
+    config = _config(
+        nodes=2, gpus=4, command=["python", "train.py", "--name", "a b"], exclude="node01", job_name="demo",
+    )
+    script = jr.build_sbatch_script(config)
+    assert "#SBATCH -N 2\n" in script
+    assert "#SBATCH --gres=gpu:4\n" in script
+    assert "#SBATCH -J demo\n#SBATCH --exclude=node01\n" in script
+    assert "--nodelist" not in script
+    assert "echo \"SLURM_NNODES=${SLURM_NNODES}\"" in script
+    assert script.endswith("--mpi=pmix bash -lc 'python train.py --name '\"'\"'a b'\"'\"''\n")
+
+    direct = jr.build_sbatch_script(dataclasses.replace(config, login_shell=False))
+    assert direct.endswith("--mpi=pmix python train.py --name 'a b'\n")
+
+
+def test_array_commands_build_one_array_script(monkeypatch, tmp_path):
+    commands_file = tmp_path / "sweep.txt"
+    commands_file.write_text("# learning rates\npython train.py --lr 0.1\n\npython train.py --lr 'a b'\n")
+    args = jr.build_parser().parse_args([
+        "-p", "gpux", "-A", "acct", "-N", "1", "-n", "1", "-c", "8",
+        "--mem", "32G", "-G", "1", "-t", "1:00:00", "--array-commands", str(commands_file),
+    ])
+    config, _, _, _ = jr.resolve_job_config(args, {}, use_defaults=True)
+    assert not config.interactive
+    assert config.array_commands == ("python train.py --lr 0.1", "python train.py --lr 'a b'")
+
+    script = jr.build_sbatch_script(config)
+    assert "#SBATCH --array=0-1\n" in script
+    assert "#SBATCH -o ./slurm-report/%A_%a.out\n" in script
+    assert "  0) WRAPSLURM_COMMAND='python train.py --lr 0.1' ;;\n" in script
+    assert "bash -lc \"${WRAPSLURM_COMMAND}\"" in script
+
+
+class FakeSbatch:
+    """Stand-in for an sbatch Popen that accepts the job as ID 101."""
+
+    returncode = 0
+
+    def __init__(self, cmd, **_kwargs):
+        self.args = cmd
+
+    def communicate(self):
+        return "101;cluster\n", ""
+
+
+def test_submit_sbatch_creates_report_dir_after_starting_sbatch(monkeypatch, tmp_path, capsys):
+    report_dir = tmp_path / "logs"
+
+    def fake_popen(cmd, **kwargs):
+        assert not report_dir.exists()
+        return FakeSbatch(cmd, **kwargs)
+
+    monkeypatch.setattr(jr.subprocess, "Popen", fake_popen)
+    assert jr.submit_sbatch("a.sbatch", str(report_dir)) == "101"
+    assert report_dir.is_dir()
+    assert "Job submitted: 101" in capsys.readouterr().out
+
+
+def test_generate_sbatch_script_writes_file(tmp_path):
+    config = _config()
+    script_path = jr.generate_sbatch_script(config, str(tmp_path / "scripts"))
+    with open(script_path, encoding="utf-8") as script_file:
+        assert script_file.read() == jr.build_sbatch_script(config)
+
+
+def test_generate_sbatch_script_never_overwrites(monkeypatch, tmp_path):
+    monkeypatch.setattr(jr.time, "strftime", lambda _fmt: "20240101_000000")
+    config = _config()
+    first = jr.generate_sbatch_script(config, str(tmp_path))
+    second = jr.generate_sbatch_script(config, str(tmp_path))
+    assert first.endswith("job_20240101_000000.sbatch")
+    assert second.endswith("job_20240101_000000_1.sbatch")
+
+
+def test_get_default_coerces_numeric_fields(capsys):
+    defaults = {"nodes": "2", "partition": "gpux", "gpus": "many", "time": None}
+    assert jr.get_default(defaults, "nodes") == 2
+    assert jr.get_default(defaults, "partition") == "gpux"
+    assert jr.get_default(defaults, "time") is None
+    assert jr.get_default(defaults, "account") is None
+    assert jr.get_default(defaults, "gpus") is None
+    assert "Ignoring stored default for 'gpus'" in capsys.readouterr().out
+
+
+def test_print_job_summary_marks_auto_and_default_fields(capsys):
+    config = _config(command=["echo", "hi"])
+    jr.print_job_summary(config, ["partition"], ["account"], "Batch")
+    out = capsys.readouterr().out
+    assert "gpux *" in out
+    assert "acct †" in out
+    assert "echo hi" in out
+    assert "Automatically detected" in out
+
+
+def test_get_default_account_reads_first_parsable_line(monkeypatch):
+    calls = []
+
+    def fake_check_output(cmd, **_kwargs):
+        calls.append(cmd)
+        return b"ent212162\nother\n"
+
+    monkeypatch.setattr(jr.subprocess, "check_output", fake_check_output)
+    assert jr.get_default_account() == "ent212162"
+    assert "--parsable2" in calls[0]
+
+
+def test_get_default_account_prefers_environment(monkeypatch):
+    def fail(*_args, **_kwargs):
+        raise AssertionError("sacctmgr should not run")
+
+    monkeypatch.setattr(jr.subprocess, "check_output", fail)
+    monkeypatch.setenv("SLURM_ACCOUNT", "from-env")
+    assert jr.get_default_account() == "from-env"
+
+
+def test_run_interactive_builds_srun_argv(monkeypatch, capsys):
+    calls = []
+    monkeypatch.setattr(jr.os, "execvp", lambda file, argv: calls.append(argv))
+    config = _config(nodes=2, command=(), nodelist="node[01-02]", interactive=True)
+    jr.run_interactive(config)
+    assert calls[0][3] == "--nodes=2"
+    assert calls[0][-3:] == ["--nodelist=node[01-02]", "--pty", "bash"]
+    assert "'--nodelist=node[01-02]' --pty bash" in capsys.readouterr().out
+
+
+def test_run_interactive_reports_missing_srun(monkeypatch, capsys):
+    def missing(file, argv):
+        raise FileNotFoundError(2, "No such file or directory", file)
+
+    monkeypatch.setattr(jr.os, "execvp", missing)
+    config = _config(command=(), interactive=True)
+    with pytest.raises(SystemExit) as excinfo:
+        jr.run_interactive(config)
+    assert excinfo.value.code == 1
+    assert "Error: [Errno 2] No such file or directory: 'srun'" in capsys.readouterr().out
+
+
+class FakeSqueue:
+    """squeue --iterate stand-in that replays iterations separated by blank lines."""
+
+    def __init__(self, output):
+        self.stdout = io.StringIO(output)
+        self.terminated = False
+
+    def terminate(self):
+        self.terminated = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def test_follow_job_prints_state_changes_until_job_leaves_queue(monkeypatch, capsys):
+    squeue = FakeSqueue(
+        "101|PENDING|Priority\n\n"
+        "101|PENDING|Priority\n\n"
+        "101|RUNNING|None\n\n"
+        "\n"
+        "101|COMPLETED|None\n\n"
+    )
+    monkeypatch.setattr(jr.subprocess, "Popen", lambda cmd, **_kwargs: squeue)
+    jr.follow_job("101")
+    out = capsys.readouterr().out
+    assert out.count("PENDING") == 1
+    assert "Job 101: RUNNING\n" in out
+    assert "COMPLETED" not in out
+    assert "left the queue" in out
+    assert squeue.terminated
+
+
+def test_follow_job_stops_once_every_task_is_terminal(monkeypatch, capsys):
+    squeue = FakeSqueue(
+        "101_1|RUNNING|None\n101_2|RUNNING|None\n\n"
+        "101_1|COMPLETED|None\n101_2|RUNNING|None\n\n"
+        "101_1|COMPLETED|None\n101_2|FAILED|NonZeroExitCode\n\n"
+        "101_1|COMPLETED|None\n101_2|FAILED|NonZeroExitCode\n\n"
+    )
+    monkeypatch.setattr(jr.subprocess, "Popen", lambda cmd, **_kwargs: squeue)
+    jr.follow_job("101")
+    out = capsys.readouterr().out
+    assert "Job 101_1: COMPLETED\n" in out
+    assert out.count("Job 101_2: FAILED (NonZeroExitCode)") == 1
+    assert squeue.stdout.read() == "101_1|COMPLETED|None\n101_2|FAILED|NonZeroExitCode\n\n"
+    assert squeue.terminated
+
+
+def test_job_config_is_frozen_and_renders_from_cache():
+    config = _config()
+    assert config.command == ("python", "train.py")
+    with pytest.raises(AttributeError):
+        config.nodes = 2
+    assert jr.build_sbatch_script(config) is jr.build_sbatch_script(config)
@@ -1,6 +1,20 @@
 import builtins
+import io
+import json
+import subprocess
+
+import pytest
+
 import wrapslurm.node_info as ni
 
+
+@pytest.fixture(autouse=True)
+def node_cache_path(monkeypatch, tmp_path):
+    path = str(tmp_path / "nodes.json")
+    monkeypatch.setattr(ni, "NODE_CACHE_PATH", path)
+    return path
+
+
 SAMPLE_NODE = """NodeName=hgpn02 Arch=x86_64 CoresPerSocket=16
    CPUAlloc=32 CPUTot=64 CPULoad=20.00
    RealMemory=191997 AllocMem=1024
@@ -18,6 +32,45 @@ def test_parse_node_data():
     assert abs(node["CPULoad"] - 20.0) < 0.01
     assert node["GPUAlloc"] == 4
     assert node["GPUTot"] == 8
+    assert node["Down"] is False
+    assert ni.parse_node_data(SAMPLE_NODE.replace("State=MIXED", "State=IDLE+DRAIN"))["Down"] is True
+
+def test_parse_node_data_reads_gres_types_with_punctuation():
+    data = SAMPLE_NODE.replace("CfgTRES=cpu=64,mem=191997M,billing=64,gres/gpu=8", "Gres=gpu:a100-80g:8(S:0-1)")
+    node = ni.parse_node_data(data)
+    assert node["GPUTot"] == 8
+    assert node["GPUDetails"] == "a100-80g=8"
+
+def test_parse_node_data_can_reject_down_nodes_early():
+    down = SAMPLE_NODE.replace("State=MIXED", "State=DOWN*")
+    assert ni.parse_node_data(down, include_down=False) is None
+    assert ni.parse_node_data(down)["NodeName"] == "hgpn02"
+    assert ni.parse_node_data(SAMPLE_NODE, include_down=False) == ni.parse_node_data(SAMPLE_NODE)
+
+def test_parse_node_data_ignores_free_text_fields():
+    data = SAMPLE_NODE + "   CPULoad=N/A\n   Reason=moved State=DOWN by admin [root@2024-01-01]\n"
+    node = ni.parse_node_data(data)
+    assert node["State"] == "MIXED"
+    assert abs(node["CPULoad"] - 20.0) < 0.01
+    assert ni.parse_node_data(data.replace("CPULoad=20.00", "CPULoad=N/A"))["CPULoad"] == 0.0
+
+@pytest.mark.parametrize("state, color", [
+    ("IDLE", "green"),
+    ("IDLE+DRAIN", "green"),
+    ("IDLE+POWERED_DOWN", "green"),
+    ("MIXED", "yellow"),
+    ("MIXED+DRAIN", "yellow"),
+    ("DRAINED", "red"),
+    ("DOWN*", "red"),
+    ("POWERED_DOWN", "red"),
+    ("POWERING_DOWN", "red"),
+    ("ALLOCATED+POWER_DOWN", "red"),
+    ("ALLOCATED", "cyan"),
+    ("COMPLETING", "cyan"),
+    ("POWERING_UP", "cyan"),
+])
+def test_ansi_state_colours_each_state_family(state, color):
+    assert ni._ansi_state(state) == f"{ni._STATE_ANSI[color]}{state}{ni._ANSI_RESET}"
 
 def test_display_nodes_graph(capsys):
     node = ni.parse_node_data(SAMPLE_NODE)
@@ -26,3 +79,208 @@ def test_display_nodes_graph(capsys):
     assert "hgpn02" in captured
     assert "CPUld" in captured
     assert "#" in captured
+
+
+DOWN_NODE = SAMPLE_NODE.replace("hgpn02", "hgpn03").replace("State=MIXED", "State=DOWN+DRAIN")
+
+
+class FakeScontrol:
+    """'scontrol show node' stand-in that streams canned text output."""
+
+    calls = []
+
+    def __init__(self, cmd, **_kwargs):
+        FakeScontrol.calls.append(cmd)
+        lines = (" ".join(node.split()) + "\n" for node in (SAMPLE_NODE, DOWN_NODE))
+        self.stdout = io.BytesIO("".join(lines).encode())
+        self.returncode = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def reject_json(cmd, **_kwargs):
+    raise subprocess.CalledProcessError(1, cmd, stderr=b"scontrol: unrecognized option '--json'\n")
+
+
+def test_get_node_info_caches_parsed_nodes(monkeypatch, tmp_path):
+    FakeScontrol.calls = calls = []
+
+    monkeypatch.setattr(ni.subprocess, "check_output", reject_json)
+    monkeypatch.setattr(ni.subprocess, "Popen", FakeScontrol)
+
+    assert [n["NodeName"] for n in ni.get_node_info()] == ["hgpn02"]
+    assert [n["NodeName"] for n in ni.get_node_info(include_down=True)] == ["hgpn02", "hgpn03"]
+    assert calls == [["scontrol", "show", "node", "-o"]]
+
+    ni.get_node_info(refresh=True)
+    assert len(calls) == 2
+
+    # Another cluster sharing the home directory gets its own entries
+    monkeypatch.setattr(ni, "cluster_key", lambda key: "other/" + key)
+    ni.get_node_info()
+    assert len(calls) == 3
+
+
+def test_iter_node_lines_skips_blank_lines():
+    lines = io.BytesIO(b"\nNodeName=a State=IDLE\n\nNodeName=b\n")
+    assert list(ni._iter_node_lines(lines)) == ["NodeName=a State=IDLE\n", "NodeName=b\n"]
+
+
+SAMPLE_NODE_JSON = {
+    "nodes": [
+        {
+            "name": "hgpn02",
+            "state": ["MIXED"],
+            "partitions": ["gpux"],
+            "cpus": 64,
+            "alloc_cpus": 32,
+            "cpu_load": 2000,
+            "real_memory": 191997,
+            "alloc_memory": 1024,
+            "tres": "cpu=64,mem=191997M,billing=64,gres/gpu=8",
+            "tres_used": "cpu=32,mem=1024M,gres/gpu=4",
+            "gres": "",
+            "gres_used": "gpu:4(IDX:0-3)",
+        }
+    ]
+}
+
+
+def test_query_nodes_prefers_json(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_check_output(cmd, **_kwargs):
+        calls.append(cmd)
+        return json.dumps(SAMPLE_NODE_JSON).encode()
+
+    monkeypatch.setattr(ni.subprocess, "check_output", fake_check_output)
+
+    assert ni._query_nodes() == [ni.parse_node_data(SAMPLE_NODE)]
+    assert calls == [["scontrol", "show", "node", "--json"]]
+
+
+def test_query_nodes_remembers_only_a_rejected_json_option(monkeypatch):
+    calls = []
+
+    def timeout_json(cmd, **_kwargs):
+        calls.append(cmd)
+        raise subprocess.CalledProcessError(1, cmd, stderr=b"slurm_load_node error: Socket timed out\n")
+
+    def record_reject(cmd, **kwargs):
+        calls.append(cmd)
+        reject_json(cmd, **kwargs)
+
+    monkeypatch.setattr(ni.subprocess, "Popen", FakeScontrol)
+    monkeypatch.setattr(ni.subprocess, "check_output", timeout_json)
+    ni._query_nodes()
+    ni._query_nodes()
+    assert len(calls) == 2
+
+    monkeypatch.setattr(ni.subprocess, "check_output", record_reject)
+    ni._query_nodes()
+    ni._query_nodes()
+    assert len(calls) == 3
+
+
+class FakeDetailPopen:
+    events = []
+
+    def __init__(self, cmd, **_kwargs):
+        self.returncode = 0
+        FakeDetailPopen.events.append("start detail")
+
+    def communicate(self):
+        return "42|train|alice|RUNNING|1:00|2:00|gres/gpu:4\n", None
+
+
+def test_show_job_detail_overlaps_squeue_calls(monkeypatch, capsys):
+    FakeDetailPopen.events = []
+
+    def fake_mapping(refresh=False):
+        FakeDetailPopen.events.append("mapping")
+        return {"hgpn02": [("42", "gpu", 4)]}
+
+    monkeypatch.setattr(ni.subprocess, "Popen", FakeDetailPopen)
+    monkeypatch.setattr(ni, "get_job_gpu_mapping", fake_mapping)
+
+    ni.show_job_detail("42")
+    out = capsys.readouterr().out
+    assert FakeDetailPopen.events == ["start detail", "mapping"]
+    assert "train" in out
+    assert "hgpn02" in out
+
+
+def test_color_state_classifies_compound_states():
+    green, yellow, red, cyan = (ni._STATE_ANSI[c] for c in ("green", "yellow", "red", "cyan"))
+    reset = ni._ANSI_RESET
+    assert ni._ansi_state("IDLE+DRAIN") == f"{green}IDLE+DRAIN{reset}"
+    assert ni._ansi_state("MIXED") == f"{yellow}MIXED{reset}"
+    assert ni._ansi_state("ALLOCATED+DRAIN") == f"{red}ALLOCATED+DRAIN{reset}"
+    assert ni._ansi_state("DOWN*") == f"{red}DOWN*{reset}"
+    assert ni._ansi_state("ALLOCATED") == f"{cyan}ALLOCATED{reset}"
+
+
+def test_set_color_switches_state_colouring(monkeypatch):
+    monkeypatch.setattr(ni, "color_state", ni.color_state)
+    monkeypatch.setattr(ni, "colored", ni.colored)
+    ni.set_color(False)
+    assert ni.color_state("IDLE") == "IDLE"
+    assert ni.colored("x", "red") == "x"
+    ni.set_color(True)
+    assert ni.color_state("IDLE") == ni._ansi_state("IDLE")
+
+
+def test_get_job_gpu_mapping_expands_node_ranges(monkeypatch):
+    calls = []
+    squeue = (
+        "101|hgpn[01-02]|gres/gpu:a100:4\n102|hgpn03|gres/gpu=2\n103|cpn01|N/A\n"
+        "104|hgpn04|gres/gpu:a100-80g:3\n"
+    )
+
+    def fake_check_output(cmd, **_kwargs):
+        calls.append(cmd)
+        if cmd[:3] == ["scontrol", "show", "hostnames"]:
+            return b"hgpn01\nhgpn02\n"
+        return squeue
+
+    monkeypatch.setattr(ni.subprocess, "check_output", fake_check_output)
+    ni._expand_nodelist.cache_clear()
+    expected = {
+        "hgpn01": [("101", "a100", 2)],
+        "hgpn02": [("101", "a100", 2)],
+        "hgpn03": [("102", "gpu", 2)],
+        "hgpn04": [("104", "a100-80g", 3)],
+    }
+    assert ni.get_job_gpu_mapping() == expected
+    assert ni.get_job_gpu_mapping() == expected
+    assert [cmd[0] for cmd in calls] == ["squeue"]
+
+
+def test_expand_nodelist_locally_keeps_zero_padding():
+    assert ni._expand_nodelist_locally("hgpn[08-10,12]") == ("hgpn08", "hgpn09", "hgpn10", "hgpn12")
+    assert ni._expand_nodelist_locally("cpn01,gpu[1-2]-ib") == ("cpn01", "gpu1-ib", "gpu2-ib")
+    assert ni._expand_nodelist_locally("rack[1-2]n[01-02]") is None
+
+
+def test_expand_nodelist_uses_scontrol_only_for_unparsed_syntax(monkeypatch):
+    calls = []
+
+    def fake_check_output(cmd, **_kwargs):
+        calls.append(cmd)
+        return b"rack1n01x1\nrack1n02x1\n"
+
+    monkeypatch.setattr(ni.subprocess, "check_output", fake_check_output)
+    ni._expand_nodelist.cache_clear()
+    assert ni._expand_nodelist("hgpn[01-02]") == ("hgpn01", "hgpn02")
+    assert calls == []
+    assert ni._expand_nodelist("rack1n[01-02]x[1]") == ("rack1n01x1", "rack1n02x1")
+    assert calls == [["scontrol", "show", "hostnames", "rack1n[01-02]x[1]"]]
+
+
+def test_tres_gpus_reads_total_and_typed_counts():
+    tres = "cpu=64,mem=191997M,gres/gpu=8,gres/gpu:3090=6,gres/gpu:a100=2,gres/gpumem=80G"
+    assert ni._tres_gpus(tres) == (8, {"3090": 6, "a100": 2})
@@ -0,0 +1,155 @@
+import io
+
+import pytest
+
+import wrapslurm.queue_info as qi
+
+
+@pytest.fixture(autouse=True)
+def clear_scontrol_cache():
+    qi._scontrol_show_job.cache_clear()
+    qi.get_user_gpu_running.cache_clear()
+    yield
+    qi._scontrol_show_job.cache_clear()
+    qi.get_user_gpu_running.cache_clear()
+
+
+def test_color_job_state_formats_each_state_once(monkeypatch):
+    calls = []
+
+    def fake_colored(text, color, attrs=None):
+        calls.append(color)
+        return f"<{color}>{text}</{color}>"
+
+    monkeypatch.setattr(qi, "colored", fake_colored)
+    qi._bold_affixes.cache_clear()
+    qi.color_job_state.cache_clear()
+    try:
+        assert qi.color_job_state("RUNNING") == "<green>RUNNING</green>"
+        assert qi.color_job_state("RUNNING") == "<green>RUNNING</green>"
+        assert qi.color_job_state("PD") == "<yellow>PD</yellow>"
+        assert qi._bold("alice", "yellow") == "<yellow>alice</yellow>"
+        assert calls == ["green", "yellow"]
+    finally:
+        qi._bold_affixes.cache_clear()
+        qi.color_job_state.cache_clear()
+
+
+class FakeSqueuePopen:
+    def __init__(self, cmd, **_kwargs):
+        self.stdout = io.StringIO(
+            '7|gpux|say "hi"|alice|RUNNING|1:00|1:00:00|1|hgpn01|4|16G|gres/gpu:1\n'
+            "8|cpu|prep|bob|PENDING|0:00|2:00:00|1|(Priority)|2|4G|N/A\n"
+        )
+        self.stderr = io.StringIO("")
+        self.returncode = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        return False
+
+
+def test_show_squeue_parses_streamed_rows(monkeypatch, capsys):
+    calls = []
+
+    def fake_run_command(cmd, shell=False):
+        calls.append(cmd)
+        return "JobId=8 JobName=prep NumCPUs=2 NumNodes=1 ReqTRES=cpu=2,mem=4G\n"
+
+    monkeypatch.setattr(qi.subprocess, "Popen", FakeSqueuePopen)
+    monkeypatch.setattr(qi, "run_command", fake_run_command)
+
+    qi.show_squeue(filter_mode="gpu")
+    out = capsys.readouterr().out
+    assert 'say "hi"' in out
+    assert "59m" in out
+    assert "4C/16G/1G" in out
+    assert "prep" not in out
+    # Only the job whose GPUs squeue's %b does not show is looked up
+    assert calls == [["scontrol", "-o", "show", "job", "8"]]
+
+
+def test_get_user_gpu_running_looks_up_only_the_users_jobs(monkeypatch):
+    calls = []
+    records = (
+        "JobId=7 JobName=a UserId=alice(1) JobState=RUNNING NumNodes=1 AllocTRES=cpu=4,gres/gpu=2\n"
+        "JobId=9 ArrayJobId=8 ArrayTaskId=1 JobState=RUNNING NumNodes=1 AllocTRES=cpu=4,gres/gpu:a100=4\n"
+        "JobId=10 JobName=b UserId=bob(2) JobState=RUNNING NumNodes=1 AllocTRES=cpu=4,gres/gpu=8\n"
+    )
+
+    def fake_run_command(cmd, shell=False):
+        calls.append(cmd)
+        return "7\n8_1" if cmd[0] == "squeue" else records
+
+    monkeypatch.setattr(qi, "run_command", fake_run_command)
+    assert qi.get_user_gpu_running("alice") == 6
+    assert qi.get_user_gpu_running("alice") == 6
+    assert calls[0][0] == "squeue"
+    assert sorted(calls[1:]) == [["scontrol", "-o", "show", "job", "7"], ["scontrol", "-o", "show", "job", "8_1"]]
+
+
+def test_show_squeue_analyzes_own_pending_jobs_without_per_job_calls(monkeypatch, capsys):
+    calls = []
+
+    def fake_run_command(cmd, shell=False):
+        calls.append(cmd)
+        return "JobId=8 JobName=prep NumCPUs=2 MinMemoryNode=4G ReqTRES=cpu=2,gres/gpu=1\n"
+
+    monkeypatch.setattr(qi.getpass, "getuser", lambda: "bob")
+    monkeypatch.setenv("USER", "bob")
+    monkeypatch.setattr(qi.subprocess, "Popen", FakeSqueuePopen)
+    monkeypatch.setattr(qi, "run_command", fake_run_command)
+
+    qi.show_squeue()
+    out = capsys.readouterr().out
+    assert "Your Pending Jobs Analysis (1 job(s))" in out
+    assert "(Priority)" in out
+    assert "2C/4G/1G" in out
+    assert calls == [["scontrol", "-o", "show", "job", "8"]]
+
+
+def test_analyze_job_reports_gpu_limit_for_squeue_user(monkeypatch, capsys):
+    outputs = {
+        "squeue": "5 PD PENDING 0:00 alice (QOSMaxGRESPerUser)",
+        "scontrol": "JobId=5 UserId=alice(1001) NumNodes=1 ReqTRES=cpu=8,gres/gpu=4",
+        "sacctmgr": "normal|gres/gpu=8",
+    }
+    monkeypatch.setattr(qi, "run_command", lambda cmd, shell=False: outputs[cmd[0]])
+    monkeypatch.setattr(qi, "get_user_gpu_running", lambda user: 6 if user == "alice" else 0)
+    monkeypatch.setattr(qi, "_which", lambda command: "/usr/bin/" + command)
+
+    qi.analyze_job("5")
+    out = capsys.readouterr().out
+    assert "The limit L satisfies: 6 <= L < 10" in out
+    assert "You would exceed this limit by 2 GPUs." in out
+
+    # Without sacctmgr on PATH it is not run at all
+    monkeypatch.setattr(qi, "_which", lambda command: None)
+    del outputs["sacctmgr"]
+    qi._scontrol_show_job.cache_clear()
+    qi.analyze_job("5")
+    out = capsys.readouterr().out
+    assert "The limit L satisfies: 6 <= L < 10" in out
+    assert "sacctmgr Estimate" not in out
+
+
+def test_scontrol_show_job_runs_once_per_job(monkeypatch):
+    calls = []
+
+    def fake_run_command(cmd, shell=False):
+        calls.append(cmd)
+        return "JobId=5 NumCPUs=8 MinMemoryNode=16G NumNodes=1 ReqTRES=cpu=8,gres/gpu=2"
+
+    monkeypatch.setattr(qi, "run_command", fake_run_command)
+    assert qi.get_job_gpu_req(5) == 2
+    assert qi.get_job_resources("5") == ("8C/16G/2G", 2)
+    assert calls == [["scontrol", "show", "job", "5"]]
+
+
+def test_squeue_gpu_count_reads_tres_per_node():
+    assert qi.squeue_gpu_count("gres/gpu:4", "2") == 8
+    assert qi.squeue_gpu_count("gres:gpu:a100:2", "1") == 2
+    assert qi.squeue_gpu_count("N/A", "1") is None
+    assert qi.format_resources(8, "16000", 0) == "8C/15G"
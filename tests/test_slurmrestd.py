@@ -0,0 +1,61 @@
+import wrapslurm.job_runner as jr
+from wrapslurm import slurmrestd
+
+REPLIES = {
+    "/slurm/v0.0.40/partitions": {
+        "partitions": [
+            {"name": "gpux", "maximums": {"time": {"set": True, "infinite": False, "number": 2880}}},
+            {"name": "debug", "maximums": {"time": {"set": True, "infinite": True, "number": 0}}},
+        ]
+    },
+    "/slurm/v0.0.40/nodes": {
+        "nodes": [
+            {"name": "g1", "cpus": 64, "real_memory": 191997, "gres": "gpu:8", "partitions": ["gpux", "debug"]},
+            {"name": "g2", "cpus": 32, "real_memory": 95000, "gres": "gpu:4", "partitions": ["gpux"]},
+        ]
+    },
+    "/slurmdb/v0.0.40/associations": {"associations": [{"account": "proj", "user": "alice"}]},
+}
+
+
+def _fake_rest(monkeypatch, replies=REPLIES):
+    requested = []
+
+    def fake_get_json(path, query=None):
+        requested.append((path, query))
+        if path not in replies:
+            raise slurmrestd.SlurmRestError(f"no reply for {path}")
+        return replies[path]
+
+    monkeypatch.setenv(slurmrestd.REST_URL_ENV, "http://slurm:6820")
+    monkeypatch.setattr(slurmrestd, "get_json", fake_get_json)
+    return requested
+
+
+def test_partition_rows(monkeypatch):
+    _fake_rest(monkeypatch)
+    assert slurmrestd.partition_rows() == [
+        ("gpux", 64, 191997, "gpu:8", "2-00:00:00"),
+        ("debug", 64, 191997, "gpu:8", None),
+        ("gpux", 32, 95000, "gpu:4", "2-00:00:00"),
+    ]
+
+
+def test_job_runner_prefers_rest(monkeypatch, tmp_path):
+    requested = _fake_rest(monkeypatch)
+    monkeypatch.setenv("USER", "alice")
+    monkeypatch.setattr(jr, "load_cached", lambda *_args, **_kwargs: None)
+    monkeypatch.setattr(jr, "save_cached", lambda *_args, **_kwargs: None)
+
+    def no_cli(*_args, **_kwargs):
+        raise AssertionError("CLI should not run when slurmrestd answers")
+
+    monkeypatch.setattr(jr.subprocess, "Popen", no_cli)
+    monkeypatch.setattr(jr.subprocess, "check_output", no_cli)
+
+    partitions = jr.query_partition_resources.__wrapped__()
+    assert partitions["gpux"].cpus_per_node == 64
+    assert partitions["gpux"].gpus == 8
+    assert partitions["debug"].max_time is None
+    assert jr.get_default_account.__wrapped__() == "proj"
+    assert ("/slurmdb/v0.0.40/associations", {"user": "alice"}) in requested
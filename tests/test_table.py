@@ -0,0 +1,18 @@
+from wrapslurm.table import render_table, visible_width
+
+
+def test_render_table_matches_ascii_table_layout():
+    rows = [("Setting", "Value"), ("Mode", "Batch"), ("CPUs", "\x1b[36m64 *\x1b[0m")]
+    assert render_table(rows, justify={0: "right"}, title="Job") == "\n".join([
+        "+Job------+-------+",
+        "| Setting | Value |",
+        "+---------+-------+",
+        "|    Mode | Batch |",
+        "|    CPUs | \x1b[36m64 *\x1b[0m  |",
+        "+---------+-------+",
+    ])
+
+
+def test_visible_width_counts_wide_characters():
+    assert visible_width("\x1b[33m50G †\x1b[0m") == 5
+    assert visible_width("\U0001F4C4 log") == 6
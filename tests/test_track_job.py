@@ -0,0 +1,38 @@
+import os
+
+import pytest
+
+import wrapslurm.track_job as tj
+
+
+@pytest.fixture
+def report_dir(tmp_path):
+    for mtime, name in enumerate(["100.out", "1200.out", "1201.out", ".1300.out", "1300.err"], start=1):
+        path = tmp_path / name
+        path.write_text(name)
+        os.utime(path, (mtime, mtime))
+    return str(tmp_path)
+
+
+def test_find_latest_log_picks_newest_out_file(report_dir):
+    assert tj.find_latest_log(report_dir) == os.path.join(report_dir, "1201.out")
+
+
+def test_find_latest_log_exits_without_logs(tmp_path, capsys):
+    with pytest.raises(SystemExit):
+        tj.find_latest_log(str(tmp_path / "missing"))
+    assert "No log files found" in capsys.readouterr().out
+
+
+def test_find_logs_matching_id_newest_first(report_dir):
+    assert tj.find_logs_matching_id("120", report_dir) == [
+        os.path.join(report_dir, "1201.out"),
+        os.path.join(report_dir, "1200.out"),
+    ]
+    assert tj.find_logs_matching_id("1300", report_dir) == []
+
+
+def test_get_running_job_ids_keeps_pipes_in_job_names(monkeypatch):
+    output = "101|train|eval\n102|prep\n\n"
+    monkeypatch.setattr(tj.subprocess, "check_output", lambda cmd, **_kwargs: output)
+    assert tj.get_running_job_ids() == [("101", "train|eval"), ("102", "prep")]
@@ -0,0 +1,142 @@
+"""Small on-disk JSON cache and file helpers shared by the wrapslurm commands."""
+
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from typing import Dict, Optional, Set, Tuple
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "wrapslurm")
+DEFAULT_CACHE_PATH = os.path.join(CACHE_DIR, "slurm_meta.json")
+# Where slurm.conf lives when $SLURM_CONF is not set
+SLURM_CONF_PATHS = ("/etc/slurm/slurm.conf", "/etc/slurm-llnl/slurm.conf")
+
+_cache_lock = threading.Lock()
+_ENSURED_DIRS: Set[str] = set()
+# path -> ((mtime_ns, size), parsed cache) for the last read of each cache file
+_CACHE_SNAPSHOTS: Dict[str, Tuple[Tuple[int, int], Dict[str, object]]] = {}
+
+
+def _read_cluster_name(path: str) -> Optional[str]:
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as conf:
+            for line in conf:
+                key, sep, value = line.partition("=")
+                if sep and key.strip().lower() == "clustername":
+                    return value.partition("#")[0].strip() or None
+    except OSError:
+        return None
+    return None
+
+
+@functools.lru_cache(maxsize=None)
+def cluster_id() -> str:
+    """
+    Name the SLURM cluster the commands talk to: $SLURM_CLUSTERS when set,
+    else ClusterName from slurm.conf ($SLURM_CONF or its default location),
+    else the $SLURM_CONF path, else this host's name. Home directories are
+    often shared between clusters, so cached SLURM data is keyed by this.
+    """
+    clusters = os.environ.get("SLURM_CLUSTERS")
+    if clusters:
+        return clusters
+    conf = os.environ.get("SLURM_CONF")
+    for path in (conf,) if conf else SLURM_CONF_PATHS:
+        name = _read_cluster_name(path)
+        if name:
+            return name
+    return conf or socket.gethostname()
+
+
+def cluster_key(key: str) -> str:
+    """``key`` qualified by the current cluster, for entries of SLURM data."""
+    return f"{cluster_id()}/{key}"
+
+
+def ensure_dir(path: str) -> None:
+    """Create ``path`` (and parents) at most once per process."""
+    path = os.path.normpath(os.fspath(path))
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
+def write_file(path: str, data: bytes, exclusive: bool = False) -> None:
+    """
+    Write ``data`` to ``path`` with raw os.write calls, bypassing Python's buffered I/O.
+
+    With ``exclusive=True`` the file must not exist yet (FileExistsError otherwise).
+    """
+    flags = os.O_WRONLY | os.O_CREAT | (os.O_EXCL if exclusive else os.O_TRUNC)
+    fd = os.open(path, flags, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def _cache_signature(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_cache(path: str) -> Dict[str, object]:
+    """
+    Parse the cache file, reusing the previous parse while its mtime and size
+    are unchanged so the partition and account lookups share a single read.
+    """
+    signature = _cache_signature(path)
+    if signature is None:
+        return {}
+    snapshot = _CACHE_SNAPSHOTS.get(path)
+    if snapshot is not None and snapshot[0] == signature:
+        return snapshot[1]
+    try:
+        with open(path, "r", encoding="utf-8") as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict):
+        data = {}
+    _CACHE_SNAPSHOTS[path] = (signature, data)
+    return data
+
+
+def load_cached(
+    key: str, ttl: Optional[float] = None, path: str = DEFAULT_CACHE_PATH
+) -> Optional[object]:
+    """
+    Return the cached payload for ``key``, or None when it is missing or older
+    than ``ttl`` seconds. A ``ttl`` of None accepts entries of any age.
+    """
+    entry = _read_cache(path).get(key)
+    if not isinstance(entry, dict) or "payload" not in entry:
+        return None
+    if ttl is not None and time.time() - entry.get("timestamp", 0) > ttl:
+        return None
+    return entry["payload"]
+
+
+def save_cached(key: str, value: object, path: str = DEFAULT_CACHE_PATH) -> None:
+    """Store ``value`` under ``key``; failures to write the cache are ignored."""
+    with _cache_lock:
+        cache = dict(_read_cache(path))
+        cache[key] = {"timestamp": time.time(), "payload": value}
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            ensure_dir(os.path.dirname(path))
+            write_file(tmp_path, json.dumps(cache).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except OSError:
+            return
+        signature = _cache_signature(path)
+        if signature is not None:
+            _CACHE_SNAPSHOTS[path] = (signature, cache)
@@ -1,10 +1,29 @@
 """Simple wrapper around scancel for cancelling SLURM jobs."""
 
 import argparse
+import re
 import subprocess
 import sys
 from typing import List
 
+# Maximum number of job IDs passed to a single scancel invocation. Keeps the
+# argument list and the resulting slurmctld RPC bounded for huge batches.
+CHUNK = 200
+
+# scancel names each job it could not act on, e.g.
+# "scancel: error: Kill job error on job id 123: Invalid job id specified"
+_FAILED_JOB_RE = re.compile(r"job id (\S+?):\s*(.*)")
+
+
+def _run_scancel(cmd: List[str]) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        cmd,
+        check=False,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        text=True,
+    )
+
 
 def cancel_jobs(job_ids: List[str], signal: str = None, user: str = None) -> int:
     """Cancel one or more SLURM jobs using scancel."""
@@ -18,18 +37,36 @@ def cancel_jobs(job_ids: List[str], signal: str = None, user: str = None) -> int
     if user:
         base_cmd.extend(["--user", user])
 
+    job_ids = list(job_ids)
     exit_code = 0
-    for job_id in job_ids:
-        cmd = base_cmd + [job_id]
+    for start in range(0, len(job_ids), CHUNK):
+        chunk = job_ids[start:start + CHUNK]
         try:
-            subprocess.run(cmd, check=True)
-            print(f"Cancelled job {job_id}")
+            proc = _run_scancel(base_cmd + chunk)
         except FileNotFoundError:
             print("Error: 'scancel' command not found. Ensure SLURM client tools are installed.")
             return 1
-        except subprocess.CalledProcessError as exc:
-            print(f"Failed to cancel job {job_id}: {exc}")
-            exit_code = exc.returncode or 1
+        if proc.returncode == 0:
+            print(f"Cancelled jobs: {' '.join(chunk)}")
+            continue
+
+        # scancel still acted on every job its stderr does not name, so
+        # report the named failures instead of sending the chunk again
+        # (which would signal those jobs a second time).
+        exit_code = proc.returncode
+        failed = {}
+        for line in proc.stderr.splitlines():
+            m = _FAILED_JOB_RE.search(line)
+            if m:
+                failed[m.group(1)] = m.group(2).strip()
+        if not failed:
+            print(f"Failed to cancel jobs {' '.join(chunk)}: {proc.stderr.strip()}")
+            continue
+        cancelled = [job_id for job_id in chunk if job_id not in failed]
+        if cancelled:
+            print(f"Cancelled jobs: {' '.join(cancelled)}")
+        for job_id, message in failed.items():
+            print(f"Failed to cancel job {job_id}: {message}")
     return exit_code
 
 
@@ -1,20 +1,25 @@
 """Interactive terminal UI for selecting SLURM job parameters."""
 
-from typing import Dict, List, Optional
+import functools
+from typing import Dict, List, Mapping, Optional
 
-try:
-    import questionary
-    from questionary import Style
 
-    QUESTIONARY_AVAILABLE = True
-except ImportError:
-    QUESTIONARY_AVAILABLE = False
+@functools.lru_cache(maxsize=None)
+def _q():
+    """Import questionary on first use; returns None when it is not installed."""
+    try:
+        import questionary
+    except ImportError:
+        return None
+    return questionary
+
 
+@functools.lru_cache(maxsize=None)
+def _custom_style():
+    """Custom style for the interactive prompts."""
+    from questionary import Style
 
-# Custom style for the interactive prompts
-CUSTOM_STYLE = None
-if QUESTIONARY_AVAILABLE:
-    CUSTOM_STYLE = Style([
+    return Style([
         ("qmark", "fg:cyan bold"),
         ("question", "fg:white bold"),
         ("answer", "fg:green bold"),
@@ -24,29 +29,55 @@ if QUESTIONARY_AVAILABLE:
     ])
 
 
+# Static choice lists shared by the prompts below
+_NODE_OPTIONS = tuple(range(1, 17))
+_CPU_OPTIONS = (1, 2, 4, 8, 16, 32, 64, 128)
+_MEM_CHOICES = ("16G", "32G", "50G", "64G", "100G", "128G", "200G", "256G", "500G", "Custom...")
+_TIME_CHOICES = (
+    "1:00:00",      # 1 hour
+    "4:00:00",      # 4 hours
+    "12:00:00",     # 12 hours
+    "1-00:00:00",   # 1 day
+    "2-00:00:00",   # 2 days
+    "4-00:00:00",   # 4 days
+    "7-00:00:00",   # 7 days
+    "Custom...",
+)
+
+# Fields whose prompt defaults are derived from the selected partition
+_PARTITION_DEPENDENT_FIELDS = frozenset(
+    {"tasks_per_node", "cpus_per_task", "memory", "gpus", "time"}
+)
+
+
+def _int_choices(values) -> List["questionary.Choice"]:
+    """Build choices that display as text but answer with the int itself."""
+    return [_q().Choice(title=str(value), value=value) for value in values]
+
+
 def prompt_partition(partitions: Dict[str, "PartitionInfo"], default: Optional[str] = None) -> str:
     """Prompt user to select a partition from available options."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default or ""
     
-    choices = []
-    for name, info in sorted(partitions.items()):
-        label = f"{name} (CPUs: {info.cpus_per_node}, Mem: {info.memory_display}, GPUs: {info.gpus})"
-        choices.append(questionary.Choice(title=label, value=name))
+    choices = [
+        questionary.Choice(
+            title=f"{name} (CPUs: {info.cpus_per_node}, Mem: {info.memory_display}, GPUs: {info.gpus})",
+            value=name,
+        )
+        for name, info in sorted(partitions.items())
+    ]
     
     # Set default selection
-    default_idx = 0
-    if default:
-        for idx, choice in enumerate(choices):
-            if choice.value == default:
-                default_idx = idx
-                break
+    name_to_idx = {choice.value: idx for idx, choice in enumerate(choices)}
+    default_idx = name_to_idx.get(default, 0)
     
     result = questionary.select(
         "Select partition:",
         choices=choices,
         default=choices[default_idx] if choices else None,
-        style=CUSTOM_STYLE,
+        style=_custom_style(),
     ).ask()
     
     return result or (default if default else "")
@@ -54,13 +85,14 @@ def prompt_partition(partitions: Dict[str, "PartitionInfo"], default: Optional[s
 
 def prompt_account(default: Optional[str] = None) -> str:
     """Prompt user to input account name."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default or ""
     
     result = questionary.text(
         "Enter account:",
         default=default or "",
-        style=CUSTOM_STYLE,
+        style=_custom_style(),
     ).ask()
     
     return result or (default if default else "")
@@ -68,90 +100,74 @@ def prompt_account(default: Optional[str] = None) -> str:
 
 def prompt_nodes(default: int = 1) -> int:
     """Prompt user to select number of nodes."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    choices = [str(i) for i in range(1, 17)]
-    default_str = str(default)
-    
     result = questionary.select(
         "Select number of nodes:",
-        choices=choices,
-        default=default_str,
-        style=CUSTOM_STYLE,
+        choices=_int_choices(_NODE_OPTIONS),
+        default=default,
+        style=_custom_style(),
     ).ask()
     
-    return int(result) if result else default
+    return result if result is not None else default
 
 
 def prompt_tasks_per_node(default: int = 1, max_val: int = 8) -> int:
     """Prompt user to select tasks per node."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    choices = [str(i) for i in range(1, max_val + 1)]
-    default_str = str(min(default, max_val))
-    
     result = questionary.select(
         "Select tasks per node:",
-        choices=choices,
-        default=default_str,
-        style=CUSTOM_STYLE,
+        choices=_int_choices(range(1, max_val + 1)),
+        default=min(default, max_val),
+        style=_custom_style(),
     ).ask()
     
-    return int(result) if result else default
+    return result if result is not None else default
 
 
 def prompt_cpus_per_task(default: int, max_val: int) -> int:
     """Prompt user to select CPUs per task."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    # Generate sensible CPU options
-    options = [1, 2, 4, 8, 16, 32, 64, 128]
-    choices = [str(c) for c in options if c <= max_val]
-    if str(max_val) not in choices:
-        choices.append(str(max_val))
-    
-    default_str = str(default) if str(default) in choices else choices[-1]
+    options = [c for c in _CPU_OPTIONS if c <= max_val]
+    if max_val not in options:
+        options.append(max_val)
     
     result = questionary.select(
         "Select CPUs per task:",
-        choices=choices,
-        default=default_str,
-        style=CUSTOM_STYLE,
+        choices=_int_choices(options),
+        default=default if default in options else options[-1],
+        style=_custom_style(),
     ).ask()
     
-    return int(result) if result else default
+    return result if result is not None else default
 
 
 def prompt_memory(default: str = "50G") -> str:
     """Prompt user to input memory allocation."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    # Common memory options
-    choices = ["16G", "32G", "50G", "64G", "100G", "128G", "200G", "256G", "500G", "Custom..."]
-    
-    # Determine default index
-    default_idx = None
-    for idx, choice in enumerate(choices):
-        if choice == default:
-            default_idx = idx
-            break
-    
     result = questionary.select(
         "Select memory:",
-        choices=choices,
-        default=choices[default_idx] if default_idx is not None else default,
-        style=CUSTOM_STYLE,
+        choices=_MEM_CHOICES,
+        default=default,
+        style=_custom_style(),
     ).ask()
     
     if result == "Custom...":
         result = questionary.text(
             "Enter memory (e.g., 50G, 200G):",
             default=default,
-            style=CUSTOM_STYLE,
+            style=_custom_style(),
         ).ask()
     
     return result or default
@@ -159,54 +175,41 @@ def prompt_memory(default: str = "50G") -> str:
 
 def prompt_gpus(default: int = 1, max_val: int = 8) -> int:
     """Prompt user to select number of GPUs."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    choices = [str(i) for i in range(0, max_val + 1)]
-    default_str = str(min(default, max_val))
-    
     result = questionary.select(
         "Select number of GPUs:",
-        choices=choices,
-        default=default_str,
-        style=CUSTOM_STYLE,
+        choices=_int_choices(range(0, max_val + 1)),
+        default=min(default, max_val),
+        style=_custom_style(),
     ).ask()
     
-    return int(result) if result else default
+    return result if result is not None else default
 
 
 def prompt_time(default: str = "4-00:00:00") -> str:
     """Prompt user to input time limit."""
-    if not QUESTIONARY_AVAILABLE:
+    questionary = _q()
+    if questionary is None:
         return default
     
-    # Common time options
-    choices = [
-        "1:00:00",      # 1 hour
-        "4:00:00",      # 4 hours
-        "12:00:00",     # 12 hours
-        "1-00:00:00",   # 1 day
-        "2-00:00:00",   # 2 days
-        "4-00:00:00",   # 4 days
-        "7-00:00:00",   # 7 days
-        "Custom...",
-    ]
-    
     # Try to find default in choices
-    default_choice = default if default in choices else "Custom..."
+    default_choice = default if default in _TIME_CHOICES else "Custom..."
     
     result = questionary.select(
         "Select time limit:",
-        choices=choices,
+        choices=_TIME_CHOICES,
         default=default_choice,
-        style=CUSTOM_STYLE,
+        style=_custom_style(),
     ).ask()
     
     if result == "Custom...":
         result = questionary.text(
             "Enter time limit (e.g., 4-00:00:00):",
             default=default,
-            style=CUSTOM_STYLE,
+            style=_custom_style(),
         ).ask()
     
     return result or default
@@ -214,23 +217,40 @@ def prompt_time(default: str = "4-00:00:00") -> str:
 
 def prompt_missing_params(
     missing_fields: List[str],
-    partition_infos: Dict[str, "PartitionInfo"],
-    defaults: Dict[str, object],
+    partition_infos: Optional[Mapping[str, "PartitionInfo"]] = None,
+    defaults: Optional[Dict[str, object]] = None,
 ) -> Dict[str, object]:
     """
     Prompt user for all missing parameters.
     
     Args:
         missing_fields: List of field names that need values
-        partition_infos: Available partitions from sinfo
+        partition_infos: Available partitions from sinfo; queried once and
+            cached for the session when omitted
         defaults: Current default values
     
     Returns:
         Dictionary of field names to selected values
     """
-    if not QUESTIONARY_AVAILABLE:
+    if not missing_fields:
+        return {}
+
+    if _q() is None:
         print("Warning: questionary not installed. Using defaults.")
         return {}
+
+    needs_partition_info = not _PARTITION_DEPENDENT_FIELDS.isdisjoint(missing_fields)
+    if partition_infos is None:
+        partition_infos = {}
+        if needs_partition_info or "partition" in missing_fields:
+            from wrapslurm.job_runner import query_partition_resources
+
+            try:
+                partition_infos = query_partition_resources()
+            except RuntimeError:
+                pass
+    if defaults is None:
+        defaults = {}
     
     results: Dict[str, object] = {}
     selected_partition_info = None
@@ -244,11 +264,10 @@ def prompt_missing_params(
         selected_partition_info = partition_infos.get(str(defaults.get("partition")))
     
     # Get partition info for smart defaults
-    if selected_partition_info is None and partition_infos:
-        selected_partition_info = max(
-            partition_infos.values(),
-            key=lambda info: (info.cpus_per_node, info.gpus, info.memory_mb),
-        )
+    if needs_partition_info and selected_partition_info is None and partition_infos:
+        from wrapslurm.job_runner import largest_partition
+
+        selected_partition_info = largest_partition(partition_infos)
     
     # Account
     if "account" in missing_fields:
@@ -311,4 +330,4 @@ def prompt_missing_params(
 
 def is_interactive_available() -> bool:
     """Check if interactive mode is available."""
-    return QUESTIONARY_AVAILABLE
+    return _q() is not None
@@ -1,30 +1,41 @@
 """User friendly front-end for submitting SLURM jobs."""
 
 import argparse
+import functools
 import json
+import operator
 import os
 import re
 import shlex
+import string
 import subprocess
-from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Dict, Iterable, List, Optional, Sequence, Tuple
-
-try:  # pragma: no cover - optional dependency used for rich tables
-    from terminaltables import AsciiTable
-except ImportError:  # pragma: no cover
-    AsciiTable = None
-
-try:  # pragma: no cover - colour output is optional in tests
-    from termcolor import colored
-except ImportError:  # pragma: no cover
-    def colored(text, *_args, **_kwargs):
-        return text
-
-from wrapslurm.interactive_config import (
-    is_interactive_available,
-    prompt_missing_params,
-)
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from wrapslurm import slurmrestd
+from wrapslurm.cache import cluster_key, ensure_dir, load_cached, save_cached, write_file
+from wrapslurm.table import render_table
+
+if TYPE_CHECKING:  # concurrent.futures (and logging) load only when a query runs
+    from concurrent.futures import Future, ThreadPoolExecutor
+
+
+@functools.lru_cache(maxsize=None)
+def _termcolor():
+    """Import termcolor on first use; colour output is optional in tests."""
+    try:
+        from termcolor import colored as termcolor_colored
+    except ImportError:  # pragma: no cover
+        def termcolor_colored(text, *_args, **_kwargs):
+            return text
+    return termcolor_colored
+
+
+def colored(text, *args, **kwargs):
+    return _termcolor()(text, *args, **kwargs)
+
 
 DEFAULT_SLURM_TEMPLATE = """#!/bin/bash
 #SBATCH -N {nodes}
@@ -35,9 +46,9 @@ DEFAULT_SLURM_TEMPLATE = """#!/bin/bash
 #SBATCH --mem={memory}
 #SBATCH --gres=gpu:{gpus}
 #SBATCH --time={time}
-#SBATCH -o {report_dir}/%j.out
-#SBATCH -e {report_dir}/%j.err
-{job_name_line}{nodelist_option}{exclude_option}
+#SBATCH -o {report_dir}/{log_name}.out
+#SBATCH -e {report_dir}/{log_name}.err
+{job_name_line}{array_option}{nodelist_option}{exclude_option}
 
 # SLURM Environment Variables
 echo "SLURM_NNODES=${{SLURM_NNODES}}"
@@ -53,9 +64,27 @@ export CUDA_LAUNCH_BLOCKING=1
 export TORCH_DISTRIBUTED_DEBUG=DETAIL
 
 # Command Execution
-srun --wait=60 --kill-on-bad-exit=1 --mpi=pmix bash -lc {command}
+{array_dispatch}srun --wait=60 --kill-on-bad-exit=1 --mpi=pmix {command_argv}
 """
 
+# (literal text, field name or None) pairs from parsing the template once at
+# import.
+_TEMPLATE_PARTS: Tuple[Tuple[str, Optional[str]], ...] = tuple(
+    (literal, field_name)
+    for literal, field_name, _format_spec, _conversion in string.Formatter().parse(
+        DEFAULT_SLURM_TEMPLATE
+    )
+)
+# The template specialised into a "%s" skeleton plus an itemgetter over its
+# fields in order, so rendering is one C-level % with no format parsing.
+_TEMPLATE_SKELETON = "".join(
+    literal.replace("%", "%%") + ("%s" if field_name is not None else "")
+    for literal, field_name in _TEMPLATE_PARTS
+)
+_TEMPLATE_VALUES = operator.itemgetter(
+    *(field_name for _literal, field_name in _TEMPLATE_PARTS if field_name is not None)
+)
+
 
 DEFAULT_REPORT_DIR = "./slurm-report"
 DEFAULT_SCRIPT_DIR = "./slurm_run"
@@ -64,6 +93,58 @@ DEFAULT_CONFIG_PATH = os.path.join(
     os.path.expanduser("~"), ".config", "wrapslurm", "defaults.json"
 )
 
+# Set WRAPSLURM_OFFLINE=1 to never run sinfo/sacctmgr (CI, docs generation);
+# the placeholders below stand in for anything SLURM would have provided.
+OFFLINE_ENV = "WRAPSLURM_OFFLINE"
+OFFLINE_PARTITION = "debug"
+OFFLINE_ACCOUNT = "dryrun"
+
+# Seconds between squeue refreshes for --follow
+FOLLOW_INTERVAL = 10
+
+PARTITION_CACHE_TTL = 5 * 60  # seconds
+ACCOUNT_CACHE_TTL = 60 * 60  # seconds
+
+# Account variables sbatch/srun already honour; used before asking sacctmgr.
+ACCOUNT_ENV_VARS = ("SBATCH_ACCOUNT", "SLURM_ACCOUNT")
+
+# Fields whose automatic values come from the partition information in sinfo
+PARTITION_FIELDS = ("partition", "cpus_per_task", "memory", "gpus", "time")
+
+# Options that --save-defaults persists
+SAVEABLE_DEFAULT_FIELDS = frozenset({
+    "partition",
+    "account",
+    "nodes",
+    "tasks_per_node",
+    "cpus_per_task",
+    "memory",
+    "gpus",
+    "time",
+    "report_dir",
+    "script_dir",
+})
+
+# (label, JobConfig attribute) pairs shown with auto/default markers in the summary
+SUMMARY_FIELDS = (
+    ("Partition", "partition"),
+    ("Account", "account"),
+    ("Nodes", "nodes"),
+    ("Tasks / Node", "tasks_per_node"),
+    ("CPUs / Task", "cpus_per_task"),
+    ("Memory", "memory"),
+    ("GPUs", "gpus"),
+    ("Time", "time"),
+)
+
+_DIGITS_RE = re.compile(r"\d+")
+# One "%R|%c|%m|%G|%l" sinfo row: partition, CPUs (last number of an A/I/O/T
+# style field), leading memory digits, gres and time limit. Matched against
+# raw bytes so the output is never decoded as a whole.
+_SINFO_ROW_RE = re.compile(
+    rb"^\s*([^|\s]+)\s*\|(?:[^|]*/)?(\d*)[^|]*\|\D*(\d*)[^|]*\|([^|]*)\|\s*([^|\s]*)"
+)
+
 DEFAULT_FIELD_TYPES: Dict[str, type] = {
     "nodes": int,
     "tasks_per_node": int,
@@ -72,9 +153,13 @@ DEFAULT_FIELD_TYPES: Dict[str, type] = {
 }
 
 
-@dataclass
+# slots=True needs Python 3.10; older interpreters get a plain frozen dataclass.
+_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(frozen=True, **_SLOTS)
 class JobConfig:
-    """Normalized configuration for a SLURM job submission."""
+    """Normalized, immutable configuration for a SLURM job submission."""
 
     nodes: int
     partition: str
@@ -85,26 +170,41 @@ class JobConfig:
     gpus: int
     time: str
     report_dir: str
-    command: Sequence[str] = field(default_factory=list)
+    command: Sequence[str] = ()
     nodelist: Optional[str] = None
     exclude: Optional[str] = None
     job_name: Optional[str] = None
     interactive: bool = False
+    array_commands: Sequence[str] = ()
+    login_shell: bool = True
 
+    def __post_init__(self) -> None:
+        # Tuples keep instances hashable, so build_sbatch_script can cache on them.
+        object.__setattr__(self, "command", tuple(self.command))
+        object.__setattr__(self, "array_commands", tuple(self.array_commands))
 
     def command_for_display(self) -> str:
         if self.interactive:
             return "Interactive shell"
+        if self.array_commands:
+            return f"Job array of {len(self.array_commands)} commands"
         if not self.command:
             return "<no command provided>"
         return " ".join(self.command)
 
-    def command_for_script(self) -> str:
+    def command_for_srun(self) -> str:
+        if self.array_commands:
+            # Array lines are shell command strings, picked per task by the
+            # case dispatch that build_sbatch_script emits.
+            return 'bash -lc "${WRAPSLURM_COMMAND}"'
         if not self.command:
             raise ValueError("Batch jobs require a command to execute.")
         command_line = shlex.join(self.command)
+        if not self.login_shell:
+            # srun execs the argv directly; quoting each word once is enough.
+            return command_line
         # Quote the entire command so that it is passed as a single argument to bash -lc.
-        return shlex.quote(command_line)
+        return f"bash -lc {shlex.quote(command_line)}"
 
 
 @dataclass
@@ -118,20 +218,66 @@ class PartitionInfo:
     gpus: int
     max_time: Optional[str]
 
-def get_default_account() -> str:
+
+# Ranks partitions by CPUs, then GPUs, then memory; attrgetter builds the
+# comparison tuples in C instead of through a Python lambda.
+_PARTITION_SIZE_KEY = operator.attrgetter("cpus_per_node", "gpus", "memory_mb")
+
+
+def largest_partition(partition_infos: Dict[str, PartitionInfo]) -> PartitionInfo:
+    """Return the partition with the most CPUs, then GPUs, then memory."""
+    return max(partition_infos.values(), key=_PARTITION_SIZE_KEY)
+
+
+def account_from_env() -> Optional[str]:
+    """The account named by $SBATCH_ACCOUNT or $SLURM_ACCOUNT, if any."""
+    for var in ACCOUNT_ENV_VARS:
+        account = os.environ.get(var)
+        if account:
+            return account
+    return None
+
+
+@functools.lru_cache(maxsize=1)
+def get_default_account(refresh: bool = False) -> str:
+    account = account_from_env()
+    if account:
+        return account
+    cache_key = cluster_key(f"account:{os.getenv('USER')}")
+    if not refresh:
+        cached = load_cached(cache_key, ACCOUNT_CACHE_TTL)
+        if cached:
+            return cached
+    if slurmrestd.rest_url():
+        try:
+            account = slurmrestd.default_account(os.getenv("USER"))
+        except slurmrestd.SlurmRestError as exc:
+            print(f"Warning: {exc}; falling back to 'sacctmgr'.")
+        else:
+            if account:
+                save_cached(cache_key, account)
+                return account
     try:
         cmd = [
             "sacctmgr",
+            "--noheader",
+            "--parsable2",
             "show",
             "assoc",
             f"user={os.getenv('USER')}",
             "format=Account",
-            "--noheader",
         ]
-        result = subprocess.check_output(cmd, text=True)
-        return result.strip().split("\n")[0].strip() or None
+        result = subprocess.check_output(cmd)
+        account = result.partition(b"\n")[0].strip().decode() or None
     except (subprocess.CalledProcessError, FileNotFoundError):
+        stale = load_cached(cache_key)
+        if stale:
+            print("Warning: 'sacctmgr' failed; using the account cached by a previous run.")
+            return stale
         raise RuntimeError("Unable to retrieve default SLURM account. Ensure 'sacctmgr' is installed.")
+    if account:
+        save_cached(cache_key, account)
+    return account
 
 
 def format_memory(memory_mb: int) -> str:
@@ -150,29 +296,30 @@ def parse_gpus(gres_field: str) -> int:
     for entry in gres_field.split(","):
         if "gpu" not in entry:
             continue
-        numbers = re.findall(r"(\d+)", entry)
-        if not numbers:
-            continue
-        try:
-            count = int(numbers[-1])
-            return max(1, count)
-        except ValueError:
+        # Drop socket affinity such as "gpu:a100:8(S:0-1)" before counting.
+        entry = entry.partition("(")[0]
+        last_match = None
+        for last_match in _DIGITS_RE.finditer(entry):
+            pass
+        if last_match is None:
             continue
+        return max(1, int(last_match.group()))
     return 1
 
 
+def _identity(value: object) -> object:
+    return value
+
+
 def get_default(defaults: Dict[str, object], key: str) -> Optional[object]:
-    if key not in defaults:
+    value = defaults.get(key)
+    if value is None:
+        return None
+    try:
+        return DEFAULT_FIELD_TYPES.get(key, _identity)(value)
+    except (TypeError, ValueError):
+        print(f"Ignoring stored default for {key!r}: {value!r}")
         return None
-    value = defaults[key]
-    target_type = DEFAULT_FIELD_TYPES.get(key)
-    if target_type is not None and value is not None:
-        try:
-            return target_type(value)
-        except (TypeError, ValueError):
-            print(f"Ignoring stored default for {key!r}: {value!r}")
-            return None
-    return value
 
 
 def load_user_defaults(path: str = DEFAULT_CONFIG_PATH) -> Dict[str, object]:
@@ -189,148 +336,395 @@ def load_user_defaults(path: str = DEFAULT_CONFIG_PATH) -> Dict[str, object]:
     return {}
 
 
-def save_user_defaults(updates: Dict[str, object], path: str = DEFAULT_CONFIG_PATH) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    defaults = load_user_defaults(path)
-    defaults.update(updates)
-    with open(path, "w", encoding="utf-8") as config_file:
-        json.dump(defaults, config_file, indent=2)
+def save_user_defaults(
+    updates: Dict[str, object],
+    path: str = DEFAULT_CONFIG_PATH,
+    defaults: Optional[Dict[str, object]] = None,
+) -> None:
+    """Merge ``updates`` into the stored defaults (re-read only when not given)."""
+    ensure_dir(os.path.dirname(path))
+    if defaults is None:
+        defaults = load_user_defaults(path)
+    defaults = {**defaults, **updates}
+    write_file(path, json.dumps(defaults, indent=2).encode("utf-8"))
     print(f"Saved defaults to {path}")
 
 
 def collect_default_updates(args: argparse.Namespace) -> Dict[str, object]:
-    fields = {
-        "partition",
-        "account",
-        "nodes",
-        "tasks_per_node",
-        "cpus_per_task",
-        "memory",
-        "gpus",
-        "time",
-        "report_dir",
-        "script_dir",
+    return {
+        key: value
+        for key, value in vars(args).items()
+        if key in SAVEABLE_DEFAULT_FIELDS and value is not None
     }
-    updates: Dict[str, object] = {}
-    for field in fields:
-        value = getattr(args, field, None)
-        if value is not None:
-            updates[field] = value
-    return updates
 
 
-def query_partition_resources() -> Dict[str, PartitionInfo]:
+def _partitions_from_cache(payload: object) -> Optional[Dict[str, PartitionInfo]]:
     try:
-        result = subprocess.check_output(
-            ["sinfo", "--format=%P|%c|%m|%G|%l", "--noheader"], text=True
-        ).strip()
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        raise RuntimeError("Unable to query SLURM resources. Ensure 'sinfo' is installed.")
+        return {name: PartitionInfo(**info) for name, info in payload.items()}
+    except (AttributeError, TypeError):
+        return None
+
+
+@functools.lru_cache(maxsize=1)
+def query_partition_resources(refresh: bool = False) -> Dict[str, PartitionInfo]:
+    """
+    Return partition limits from sinfo, served from the on-disk cache while it
+    is younger than PARTITION_CACHE_TTL. If sinfo fails, the last known good
+    result is used with a warning.
+    """
+    if not refresh:
+        cached = _partitions_from_cache(load_cached(cluster_key("partitions"), PARTITION_CACHE_TTL))
+        if cached:
+            return cached
+    try:
+        partitions = _query_partition_resources()
+    except RuntimeError:
+        stale = _partitions_from_cache(load_cached(cluster_key("partitions")))
+        if not stale:
+            raise
+        print("Warning: 'sinfo' failed; using partition data cached by a previous run.")
+        return stale
+    if partitions:
+        save_cached(cluster_key("partitions"), {name: asdict(info) for name, info in partitions.items()})
+    return partitions
+
 
+def _merge_partition_row(
+    partitions: Dict[str, PartitionInfo],
+    name: str,
+    cpus: int,
+    memory_mb: int,
+    gres: str,
+    max_time: Optional[str],
+) -> None:
+    """Keep the row with the most CPUs for partitions that mix node types."""
+    partition_info = partitions.get(name)
+    if partition_info is None or cpus > partition_info.cpus_per_node:
+        partitions[name] = PartitionInfo(
+            name=name,
+            cpus_per_node=cpus,
+            memory_mb=memory_mb,
+            memory_display=format_memory(memory_mb),
+            gpus=parse_gpus(gres),
+            max_time=max_time,
+        )
+
+
+def _query_partition_resources() -> Dict[str, PartitionInfo]:
     partitions: Dict[str, PartitionInfo] = {}
-    for line in result.split("\n"):
-        if not line.strip():
-            continue
-        parts = line.split("|")
-        if len(parts) < 5:
-            continue
-        partition_name_raw, cpu_info, memory_raw, gres, max_time = parts[:5]
-        partition_name = partition_name_raw.split("*")[0].strip()
-        if not partition_name:
-            continue
-        cpu_pieces = [piece for piece in cpu_info.split("/") if piece]
-        try:
-            cpus_total = int(cpu_pieces[-1]) if cpu_pieces else 1
-        except ValueError:
-            cpus_total = 1
-        memory_digits = "".join(filter(str.isdigit, memory_raw))
+    if slurmrestd.rest_url():
         try:
-            memory_mb = int(memory_digits) if memory_digits else 0
-        except ValueError:
-            memory_mb = 0
-        memory_display = format_memory(memory_mb)
-        gpus = parse_gpus(gres)
-        partition_info = partitions.get(partition_name)
-        if partition_info is None or cpus_total > partition_info.cpus_per_node:
-            partitions[partition_name] = PartitionInfo(
-                name=partition_name,
-                cpus_per_node=cpus_total,
-                memory_mb=memory_mb,
-                memory_display=memory_display,
-                gpus=gpus,
-                max_time=max_time.strip() or None,
+            for row in slurmrestd.partition_rows():
+                _merge_partition_row(partitions, *row)
+        except slurmrestd.SlurmRestError as exc:
+            print(f"Warning: {exc}; falling back to 'sinfo'.")
+            partitions.clear()
+        else:
+            return partitions
+
+    error_message = "Unable to query SLURM resources. Ensure 'sinfo' is installed."
+    try:
+        proc = subprocess.Popen(
+            ["sinfo", "--format=%R|%c|%m|%G|%l", "--noheader"],
+            stdout=subprocess.PIPE,
+        )
+    except FileNotFoundError:
+        raise RuntimeError(error_message)
+
+    # sinfo already groups nodes with matching resources, so this yields one
+    # row per partition unless it mixes node types. %R omits the "*" marker
+    # that %P appends to the default partition. Lines are parsed as sinfo
+    # produces them rather than buffering the whole output.
+    match_row = _SINFO_ROW_RE.match
+    with proc:
+        for line in proc.stdout:
+            row = match_row(line)
+            if row is None:
+                continue
+            name, cpus, memory_mb, gres, max_time = row.groups()
+            _merge_partition_row(
+                partitions,
+                name.decode(),
+                int(cpus) if cpus else 1,
+                int(memory_mb) if memory_mb else 0,
+                gres.decode(),
+                max_time.decode() or None,
             )
+    if proc.returncode:
+        raise RuntimeError(error_message)
     return partitions
 
-def build_sbatch_script(config: JobConfig) -> str:
-    nodelist_option = f"#SBATCH --nodelist={config.nodelist}\n" if config.nodelist else ""
-    exclude_option = f"#SBATCH --exclude={config.exclude}\n" if config.exclude else ""
-    job_name_line = f"#SBATCH -J {config.job_name}\n" if config.job_name else ""
-    return DEFAULT_SLURM_TEMPLATE.format(
-        nodes=config.nodes,
-        partition=config.partition,
-        account=config.account,
-        tasks_per_node=config.tasks_per_node,
-        cpus_per_task=config.cpus_per_task,
-        memory=config.memory,
-        gpus=config.gpus,
-        time=config.time,
-        report_dir=config.report_dir,
-        nodelist_option=nodelist_option,
-        exclude_option=exclude_option,
-        job_name_line=job_name_line,
-        command=config.command_for_script(),
+
+def skip_slurm_queries() -> bool:
+    """
+    True when SLURM must not be queried because WRAPSLURM_OFFLINE=1 is set;
+    placeholders then stand in for whatever sinfo/sacctmgr would provide.
+    """
+    return os.environ.get(OFFLINE_ENV) == "1"
+
+
+def _offline_partition_infos(name: Optional[str]) -> Dict[str, PartitionInfo]:
+    name = name or OFFLINE_PARTITION
+    return {
+        name: PartitionInfo(
+            name=name,
+            cpus_per_node=1,
+            memory_mb=0,
+            memory_display=format_memory(0),
+            gpus=1,
+            max_time=None,
+        )
+    }
+
+
+@functools.lru_cache(maxsize=1)
+def _executor() -> "ThreadPoolExecutor":
+    """Worker threads for the sinfo and sacctmgr prefetch queries."""
+    from concurrent.futures import ThreadPoolExecutor
+
+    # concurrent.futures joins its workers at interpreter exit.
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="wrapslurm")
+
+
+def prefetch_slurm_metadata(
+    args: argparse.Namespace,
+    defaults: Dict[str, object],
+    executor: Optional["ThreadPoolExecutor"] = None,
+) -> Tuple[Optional["Future"], Optional["Future"]]:
+    """
+    Start the sinfo and sacctmgr queries that resolve_job_config will need in
+    the background, so their RPC round-trips overlap instead of running back
+    to back. Returns ``(partitions_future, account_future)``; a future is None
+    when the CLI flags and saved defaults already cover what it would provide.
+    """
+    partitions_future = None
+    account_future = None
+    if skip_slurm_queries():
+        return partitions_future, account_future
+    if executor is None:
+        executor = _executor()
+    if any(
+        getattr(args, key) is None and get_default(defaults, key) is None
+        for key in PARTITION_FIELDS
+    ):
+        partitions_future = executor.submit(query_partition_resources, args.refresh_cache)
+    if (
+        args.account is None
+        and get_default(defaults, "account") is None
+        and account_from_env() is None
+    ):
+        account_future = executor.submit(get_default_account, args.refresh_cache)
+    return partitions_future, account_future
+
+
+def _render_template(values: Dict[str, object]) -> str:
+    return _TEMPLATE_SKELETON % _TEMPLATE_VALUES(values)
+
+
+def _array_dispatch(commands: Sequence[str]) -> str:
+    """Shell ``case`` that picks this array task's command by index."""
+    branches = "".join(
+        f"  {index}) WRAPSLURM_COMMAND={shlex.quote(command)} ;;\n"
+        for index, command in enumerate(commands)
     )
+    return f'case "${{SLURM_ARRAY_TASK_ID}}" in\n{branches}esac\n'
+
+
+@functools.lru_cache(maxsize=64)
+def build_sbatch_script(config: JobConfig) -> str:
+    array_size = len(config.array_commands)
+    return _render_template({
+        "nodes": config.nodes,
+        "partition": config.partition,
+        "account": config.account,
+        "tasks_per_node": config.tasks_per_node,
+        "cpus_per_task": config.cpus_per_task,
+        "memory": config.memory,
+        "gpus": config.gpus,
+        "time": config.time,
+        "report_dir": config.report_dir,
+        "log_name": "%A_%a" if array_size else "%j",
+        "array_option": f"#SBATCH --array=0-{array_size - 1}\n" if array_size else "",
+        "array_dispatch": _array_dispatch(config.array_commands) if array_size else "",
+        "nodelist_option": f"#SBATCH --nodelist={config.nodelist}\n" if config.nodelist else "",
+        "exclude_option": f"#SBATCH --exclude={config.exclude}\n" if config.exclude else "",
+        "job_name_line": f"#SBATCH -J {config.job_name}\n" if config.job_name else "",
+        "command_argv": config.command_for_srun(),
+    })
 
 
 def generate_sbatch_script(config: JobConfig, script_dir: str) -> str:
     sbatch_script = build_sbatch_script(config)
 
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    script_name = f"job_{timestamp}.sbatch"
-    script_path = os.path.join(os.getcwd(), script_dir, script_name)
-
-    os.makedirs(os.path.dirname(script_path), exist_ok=True)
-    with open(script_path, "w", encoding="utf-8") as f:
-        f.write(sbatch_script)
+    timestamp = time.strftime("%Y%m%d_%H%M%S")
+    data = sbatch_script.encode("utf-8")
+
+    ensure_dir(script_dir)
+    # Created exclusively, so two submissions in the same second get separate
+    # files instead of one truncating a script the other has yet to submit.
+    suffix = 0
+    while True:
+        script_name = f"job_{timestamp}{f'_{suffix}' if suffix else ''}.sbatch"
+        # Relative directories resolve against the cwd on their own; no getcwd().
+        script_path = os.path.join(script_dir, script_name)
+        try:
+            write_file(script_path, data, exclusive=True)
+        except FileExistsError:
+            suffix += 1
+            continue
+        break
     print(f"Generated sbatch script: {script_path}")
     return script_path
 
 
-def submit_sbatch(script_path: str, report_dir: str) -> None:
-    os.makedirs(report_dir, exist_ok=True)
+def _start_sbatch(script_path: str) -> subprocess.Popen:
+    return subprocess.Popen(
+        ["sbatch", "--parsable", script_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        # wr holds no descriptors sbatch could misuse; skip the close-all loop.
+        close_fds=False,
+    )
+
+
+def _finish_sbatch(proc: subprocess.Popen) -> Tuple[Optional[str], str]:
+    """Wait for sbatch; returns ``(job_id, message)``."""
+    stdout, stderr = proc.communicate()
+    if proc.returncode:
+        return None, f"Error submitting job: {stderr.strip()}"
+    # --parsable prints "<jobid>" or "<jobid>;<cluster>"
+    job_id = stdout.strip().split(";", 1)[0]
+    return job_id, f"Job submitted: {job_id}"
+
+
+def _print_log_locations(job_id: str, report_dir: str, array_job: bool = False) -> None:
+    # Array tasks log to "<array id>_<task index>", see build_sbatch_script.
+    log_name = f"{job_id}_*" if array_job else job_id
+    stdout_log = os.path.join(report_dir, f"{log_name}.out")
+    stderr_log = os.path.join(report_dir, f"{log_name}.err")
+    print(f"Stdout log: {stdout_log}")
+    print(f"Stderr log: {stderr_log}")
+    print(f"Monitor logs: tail -n 20 -f {stdout_log}")
+
+
+def submit_sbatch(script_path: str, report_dir: str, array_job: bool = False) -> Optional[str]:
+    # Create the log directory while sbatch is talking to slurmctld.
+    proc = _start_sbatch(script_path)
+    ensure_dir(report_dir)
+    job_id, message = _finish_sbatch(proc)
+    print(message)
+    if job_id is not None:
+        _print_log_locations(job_id, report_dir, array_job)
+    return job_id
+
+
+def _state_colour(state: str) -> str:
+    if state in ("PENDING", "CONFIGURING", "REQUEUED", "SUSPENDED"):
+        return "yellow"
+    if state in ("RUNNING", "COMPLETING", "COMPLETED"):
+        return "green"
+    return "red"
+
+
+# squeue keeps listing finished jobs until MinJobAge expires (300 s by
+# default), so follow_job stops once every task reaches one of these.
+TERMINAL_STATES = frozenset({
+    "BOOT_FAIL", "CANCELLED", "COMPLETED", "DEADLINE", "FAILED",
+    "NODE_FAIL", "OUT_OF_MEMORY", "PREEMPTED", "SPECIAL_EXIT", "TIMEOUT",
+})
+
+
+def follow_job(job_id: str, interval: int = FOLLOW_INTERVAL) -> None:
+    """
+    Print the job's state changes from one long-lived ``squeue -i`` process
+    until every task has finished or the job leaves the queue, instead of
+    polling squeue repeatedly.
+    """
+    cmd = [
+        "squeue",
+        "--jobs", job_id,
+        "--iterate", str(interval),
+        "--noheader",
+        "--format=%i|%T|%R",
+    ]
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+        )
+    except FileNotFoundError:
+        print("Unable to follow the job: 'squeue' is not installed.")
+        return
+
+    print(f"Following job {job_id} (Ctrl-C to stop)...")
+    last_states: Dict[str, Tuple[str, str]] = {}
+    rows_in_iteration = 0
+    active_in_iteration = False
     try:
-        result = subprocess.run(["sbatch", script_path], capture_output=True, text=True, check=True)
-        job_id = result.stdout.strip().split()[-1]
-        print(f"Job submitted: {result.stdout.strip()}")
-        stdout_log = os.path.join(report_dir, f"{job_id}.out")
-        stderr_log = os.path.join(report_dir, f"{job_id}.err")
-        print(f"Stdout log: {stdout_log}")
-        print(f"Stderr log: {stderr_log}")
-        print(f"Monitor logs: tail -n 20 -f {stdout_log}")
-    except subprocess.CalledProcessError as e:
-        print(f"Error submitting job: {e.stderr.strip()}")
+        with proc:
+            for line in proc.stdout:
+                fields = line.strip().split("|")
+                if len(fields) < 3:
+                    # squeue ends each iteration with a blank line; stop after
+                    # an iteration without rows (the job has left the queue)
+                    # or one in which every task has finished.
+                    if not line.strip():
+                        if rows_in_iteration == 0 or not active_in_iteration:
+                            break
+                        rows_in_iteration = 0
+                        active_in_iteration = False
+                    continue
+                rows_in_iteration += 1
+                task_id, state, reason = fields[:3]
+                # "CANCELLED by <uid>" still counts as CANCELLED.
+                if state.split(" ", 1)[0] not in TERMINAL_STATES:
+                    active_in_iteration = True
+                if last_states.get(task_id) == (state, reason):
+                    continue
+                last_states[task_id] = (state, reason)
+                detail = f" ({reason})" if reason and reason != "None" else ""
+                print(f"Job {task_id}: {colored(state, _state_colour(state))}{detail}")
+            proc.terminate()
+    except KeyboardInterrupt:
+        proc.terminate()
+        print("\nStopped following the job.")
+        return
+    print(f"Job {job_id} has finished or left the queue; see 'sacct -j {job_id}' for its final state.")
+
 
 def run_interactive(config: JobConfig) -> None:
     srun_cmd = [
         "srun",
         f"--partition={config.partition}",
         f"--account={config.account}",
-        f"-N {config.nodes}",
+        f"--nodes={config.nodes}",
         f"--ntasks-per-node={config.tasks_per_node}",
         f"--cpus-per-task={config.cpus_per_task}",
         f"--mem={config.memory}",
         f"--gres=gpu:{config.gpus}",
         f"--time={config.time}",
+        *((f"--nodelist={config.nodelist}",) if config.nodelist else ()),
+        *((f"--exclude={config.exclude}",) if config.exclude else ()),
         "--pty",
-        "bash"
+        "bash",
     ]
-    if config.nodelist:
-        srun_cmd.insert(-2, f"--nodelist={config.nodelist}")
-    if config.exclude:
-        srun_cmd.insert(-2, f"--exclude={config.exclude}")
-    print(f"Starting interactive session with: {' '.join(srun_cmd)}")
-    subprocess.run(srun_cmd)
+    print(f"Starting interactive session with: {shlex.join(srun_cmd)}")
+    # Replace this process with srun: there is nothing left for wr to do, and
+    # the shell gets the terminal without an idle Python parent behind it.
+    sys.stdout.flush()
+    try:
+        os.execvp(srun_cmd[0], srun_cmd)
+    except OSError as exc:
+        print(f"Error: {exc}")
+        sys.exit(1)
+
+
+@functools.lru_cache(maxsize=None)
+def _colour_affixes(color: str) -> Tuple[str, str]:
+    """The (prefix, suffix) escape codes ``colored`` wraps text in for ``color``."""
+    prefix, _, suffix = colored("\0", color).partition("\0")
+    return prefix, suffix
+
 
 def highlight_value(
     value: str,
@@ -339,9 +733,11 @@ def highlight_value(
     default_fields: Iterable[str],
 ) -> str:
     if field in auto_fields:
-        return colored(f"{value} *", "cyan")
+        prefix, suffix = _colour_affixes("cyan")
+        return f"{prefix}{value} *{suffix}"
     if field in default_fields:
-        return colored(f"{value} \u2020", "yellow")
+        prefix, suffix = _colour_affixes("yellow")
+        return f"{prefix}{value} \u2020{suffix}"
     return str(value)
 
 
@@ -352,35 +748,14 @@ def print_job_summary(
     mode: str,
     script_path: Optional[str] = None,
 ) -> None:
+    auto_set = frozenset(auto_fields)
+    default_set = frozenset(default_fields)
     rows = [
         ("Mode", mode),
-        (
-            "Partition",
-            highlight_value(config.partition, "partition", auto_fields, default_fields),
-        ),
-        ("Account", highlight_value(config.account, "account", auto_fields, default_fields)),
-        ("Nodes", highlight_value(config.nodes, "nodes", auto_fields, default_fields)),
-        (
-            "Tasks / Node",
-            highlight_value(
-                config.tasks_per_node,
-                "tasks_per_node",
-                auto_fields,
-                default_fields,
-            ),
-        ),
-        (
-            "CPUs / Task",
-            highlight_value(
-                config.cpus_per_task,
-                "cpus_per_task",
-                auto_fields,
-                default_fields,
-            ),
-        ),
-        ("Memory", highlight_value(config.memory, "memory", auto_fields, default_fields)),
-        ("GPUs", highlight_value(config.gpus, "gpus", auto_fields, default_fields)),
-        ("Time", highlight_value(config.time, "time", auto_fields, default_fields)),
+        *[
+            (label, highlight_value(getattr(config, key), key, auto_set, default_set))
+            for label, key in SUMMARY_FIELDS
+        ],
         ("Command", config.command_for_display()),
     ]
 
@@ -391,30 +766,48 @@ def print_job_summary(
     if config.job_name:
         rows.append(("Job Name", config.job_name))
     rows.append(
-        ("Log Dir", highlight_value(config.report_dir, "report_dir", auto_fields, default_fields))
+        ("Log Dir", highlight_value(config.report_dir, "report_dir", auto_set, default_set))
     )
     if script_path:
         rows.append(("Script", script_path))
 
-    if AsciiTable:
-        table = AsciiTable([["Setting", "Value"]] + list(rows))
-        table.justify_columns[0] = "right"
-        for col in range(1, len(table.table_data[0])):
-            table.justify_columns[col] = "left"
-        print(table.table)
-    else:  # pragma: no cover - fallback formatting for missing dependency
-        for setting, value in rows:
-            print(f"{setting:>12}: {value}")
-
-    if auto_fields:
+    print(render_table([("Setting", "Value"), *rows], justify={0: "right"}))
+
+    if auto_set:
         print(colored("* Automatically detected value", "cyan"))
-    if default_fields:
+    if default_set:
         print(colored("† Loaded from saved defaults", "yellow"))
 
 
+def load_array_commands(path: str) -> List[str]:
+    """Read one command per line, skipping blank lines and ``#`` comments."""
+    try:
+        with open(path, "r", encoding="utf-8") as command_file:
+            commands = [
+                line.strip()
+                for line in command_file
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+    except OSError as exc:
+        raise RuntimeError(f"Unable to read --array-commands file {path}: {exc.strerror}")
+    if not commands:
+        raise RuntimeError(f"No commands found in --array-commands file {path}")
+    return commands
+
+
 def resolve_job_config(
-    args: argparse.Namespace, defaults: Dict[str, object], use_defaults: bool = False
+    args: argparse.Namespace,
+    defaults: Dict[str, object],
+    use_defaults: bool = False,
+    partitions_future: Optional["Future"] = None,
+    account_future: Optional["Future"] = None,
 ) -> Tuple[JobConfig, List[str], List[str], str]:
+    # Imported here so non-interactive code paths never load the prompt UI.
+    from wrapslurm.interactive_config import (
+        is_interactive_available,
+        prompt_missing_params,
+    )
+
     auto_fields: List[str] = []
     default_fields: List[str] = []
 
@@ -432,27 +825,33 @@ def resolve_job_config(
     cpus_per_task = use_default(args.cpus_per_task, "cpus_per_task")
     memory = use_default(args.memory, "memory")
     gpus = use_default(args.gpus, "gpus")
-    time = use_default(args.time, "time")
+    time_limit = use_default(args.time, "time")
     report_dir = use_default(args.report_dir, "report_dir") or DEFAULT_REPORT_DIR
     script_dir = use_default(args.script_dir, "script_dir") or DEFAULT_SCRIPT_DIR
 
+    account = use_default(args.account, "account")
+
     partition_infos: Dict[str, PartitionInfo] = {}
     partition_info: Optional[PartitionInfo] = None
+    partition_error: Optional[RuntimeError] = None
+    partitions_fetched = False
+    offline = skip_slurm_queries()
 
-    need_partition_data = (
-        partition is None
-        or cpus_per_task is None
-        or memory is None
-        or gpus is None
-        or time is None
-    )
-
-    if need_partition_data:
+    def fetch_partition_infos() -> None:
+        nonlocal partition_infos, partition_error, partitions_fetched
+        if partitions_fetched:
+            return
+        partitions_fetched = True
+        if offline:
+            partition_infos = _offline_partition_infos(partition)
+            return
         try:
-            partition_infos = query_partition_resources()
+            if partitions_future is not None:
+                partition_infos = partitions_future.result()
+            else:
+                partition_infos = query_partition_resources(refresh=args.refresh_cache)
         except RuntimeError as exc:
-            if partition is None or cpus_per_task is None or memory is None or gpus is None:
-                raise RuntimeError(str(exc))
+            partition_error = exc
 
     # Determine which fields are missing and need interactive prompts
     missing_fields: List[str] = []
@@ -468,14 +867,17 @@ def resolve_job_config(
         missing_fields.append("memory")
     if gpus is None:
         missing_fields.append("gpus")
-    if time is None:
+    if time_limit is None:
         missing_fields.append("time")
-    if args.account is None and get_default(defaults, "account") is None:
+    if account is None:
         missing_fields.append("account")
 
     # Use interactive prompts if not using defaults mode and there are missing fields
     interactive_results: Dict[str, object] = {}
     if missing_fields and not use_defaults and is_interactive_available():
+        # Prompts for partition-derived fields offer choices based on sinfo.
+        if any(key in missing_fields for key in PARTITION_FIELDS):
+            fetch_partition_infos()
         interactive_results = prompt_missing_params(
             missing_fields=missing_fields,
             partition_infos=partition_infos,
@@ -495,17 +897,30 @@ def resolve_job_config(
         if "gpus" in interactive_results:
             gpus = interactive_results["gpus"]
         if "time" in interactive_results:
-            time = interactive_results["time"]
+            time_limit = interactive_results["time"]
+        if "account" in interactive_results:
+            account = interactive_results["account"]
+
+    # Only query sinfo when a partition-derived value is still unknown.
+    if (
+        partition is None
+        or cpus_per_task is None
+        or memory is None
+        or gpus is None
+        or time_limit is None
+    ):
+        fetch_partition_infos()
+        if partition_error is not None and (
+            partition is None or cpus_per_task is None or memory is None or gpus is None
+        ):
+            raise RuntimeError(str(partition_error))
 
     if partition is None:
         if not partition_infos:
             raise RuntimeError(
                 "Unable to determine partition. Provide --partition or ensure 'sinfo' is available."
             )
-        partition_info = max(
-            partition_infos.values(),
-            key=lambda info: (info.cpus_per_node, info.gpus, info.memory_mb),
-        )
+        partition_info = largest_partition(partition_infos)
         partition = partition_info.name
         auto_fields.append("partition")
     else:
@@ -542,26 +957,30 @@ def resolve_job_config(
             gpus = 1
         auto_fields.append("gpus")
 
-    if time is None:
+    if time_limit is None:
         if partition_info is not None and partition_info.max_time:
-            time = partition_info.max_time
+            time_limit = partition_info.max_time
         else:
-            time = DEFAULT_TIME
+            time_limit = DEFAULT_TIME
         auto_fields.append("time")
 
-    try:
-        account = use_default(args.account, "account")
-        if account is None and "account" in interactive_results:
-            account = interactive_results["account"]
-        if account is None:
-            account = get_default_account()
-            auto_fields.append("account")
-    except RuntimeError as exc:
-        raise RuntimeError(str(exc))
+    if account is None:
+        if offline:
+            account = OFFLINE_ACCOUNT
+        elif account_future is not None:
+            account = account_future.result()
+        else:
+            account = get_default_account(refresh=args.refresh_cache)
+        auto_fields.append("account")
 
     command_parts: Sequence[str] = list(args.command or [])
+    array_commands: List[str] = []
     interactive = args.interactive
-    if not command_parts:
+    if args.array_commands:
+        if command_parts or interactive:
+            raise RuntimeError("--array-commands cannot be combined with a command or --interactive.")
+        array_commands = load_array_commands(args.array_commands)
+    elif not command_parts:
         interactive = True
     elif len(command_parts) == 1 and command_parts[0].strip() == "bash":
         interactive = True
@@ -574,13 +993,15 @@ def resolve_job_config(
         cpus_per_task=int(cpus_per_task),
         memory=str(memory),
         gpus=int(gpus),
-        time=str(time),
+        time=str(time_limit),
         report_dir=str(report_dir),
         command=command_parts,
         nodelist=args.nodelist,
         exclude=args.exclude,
         job_name=args.job_name,
         interactive=interactive,
+        array_commands=array_commands,
+        login_shell=args.login_shell,
     )
 
     return config, auto_fields, default_fields, script_dir
@@ -618,13 +1039,35 @@ def build_parser() -> argparse.ArgumentParser:
         "--script-dir",
         help=f"Directory to store generated sbatch scripts (default: {DEFAULT_SCRIPT_DIR})",
     )
+    parser.add_argument(
+        "--array-commands",
+        metavar="FILE",
+        help="Submit one job array running each line of FILE as a separate task",
+    )
+    parser.add_argument(
+        "--no-login-shell",
+        dest="login_shell",
+        action="store_false",
+        help="Let srun exec the command directly instead of through 'bash -lc' "
+        "(skips ~/.bash_profile, so module loads and conda activation there do not apply)",
+    )
     parser.add_argument("-i", "--interactive", action="store_true", help="Force an interactive srun session")
     parser.add_argument("--dry-run", action="store_true", help="Show the sbatch script without submitting")
+    parser.add_argument(
+        "--follow",
+        action="store_true",
+        help="After submitting, print the job's state changes until it leaves the queue",
+    )
     parser.add_argument(
         "-d", "--defaults",
         action="store_true",
         help="Use auto-detected defaults without interactive prompts",
     )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help="Ignore cached sinfo/sacctmgr results and query SLURM again",
+    )
     parser.add_argument(
         "--save-defaults",
         action="store_true",
@@ -644,17 +1087,26 @@ def main() -> None:
 
     defaults = load_user_defaults()
 
+    if args.refresh_cache:
+        query_partition_resources.cache_clear()
+        get_default_account.cache_clear()
+
     if args.save_defaults:
         updates = collect_default_updates(args)
         if updates:
-            save_user_defaults(updates)
+            save_user_defaults(updates, defaults=defaults)
         else:
             print("No values provided to save as defaults.")
         return
 
     try:
+        partitions_future, account_future = prefetch_slurm_metadata(args, defaults)
         config, auto_fields, default_fields, script_dir = resolve_job_config(
-            args, defaults, use_defaults=args.defaults
+            args,
+            defaults,
+            use_defaults=args.defaults,
+            partitions_future=partitions_future,
+            account_future=account_future,
         )
     except RuntimeError as exc:
         print(f"Error: {exc}")
@@ -685,7 +1137,9 @@ def main() -> None:
         return
 
     print_job_summary(config, auto_fields, default_fields, mode, script_path=script_path)
-    submit_sbatch(script_path, config.report_dir)
+    job_id = submit_sbatch(script_path, config.report_dir, array_job=bool(config.array_commands))
+    if args.follow and job_id is not None:
+        follow_job(job_id)
 
 if __name__ == "__main__":
     main()
@@ -1,71 +1,277 @@
 import argparse
+import functools
+import json
+import os
 import subprocess
 import re
+import sys
 
-try:
-    from terminaltables import AsciiTable
-except ImportError:  # pragma: no cover - fallback when dependency missing
-    class AsciiTable:
-        def __init__(self, data):
-            self.table = "\n".join(" | ".join(map(str, row)) for row in data)
-        justify_columns = {}
+from wrapslurm.cache import CACHE_DIR, cluster_key, load_cached, save_cached
+from wrapslurm.table import render_table
 
-try:
-    from termcolor import colored
-except ImportError:  # pragma: no cover - fallback to no-op
-    def colored(text, *_args, **_kwargs):
-        return text
 
+def _plain_colored(text, *_args, **_kwargs):
+    return text
 
-def get_node_info(include_down=False):
+
+@functools.lru_cache(maxsize=None)
+def _termcolor():
+    """Import termcolor on first use, so plain output never loads it."""
+    try:
+        from termcolor import colored as termcolor_colored
+    except ImportError:  # pragma: no cover - fallback to no-op
+        return _plain_colored
+    return termcolor_colored
+
+
+def _termcolor_colored(text, *args, **kwargs):
+    return _termcolor()(text, *args, **kwargs)
+
+
+colored = _termcolor_colored
+
+
+# Parsed 'scontrol show node' output is reused for this many seconds, so
+# repeated winfo calls do not each hit slurmctld. Kept apart from the
+# partition/account cache because it can be large on big clusters; entries
+# are keyed by cluster_key, as home directories may span clusters.
+NODE_CACHE_PATH = os.path.join(CACHE_DIR, "nodes.json")
+NODE_CACHE_TTL = 30
+
+# 'scontrol show node --json' is preferred; once scontrol rejects the option
+# (SLURM older than 21.08) the text parser is used for this long, on that
+# cluster only. Other failures fall back to text for that one query.
+_JSON_UNSUPPORTED_KEY = "scontrol_json_unsupported"
+_JSON_UNSUPPORTED_TTL = 24 * 60 * 60
+_JSON_REJECTED_RE = re.compile(rb"(?:unrecognized|unknown|invalid) option|--json", re.IGNORECASE)
+
+# Patterns for the GPU details parse_node_data reads from the GRES fields,
+# compiled once instead of going through re's cache on every call.
+_GRES_USED_GPU_RE = re.compile(r"\S*?gpu:(\d+)")
+_GRES_GPU_TYPE_RE = re.compile(r"gpu:([^:,()\s]+):(\d+)")
+_GRES_GPU_COUNT_RE = re.compile(r"gpu[^:]*:(\d+)")
+
+# One 'squeue -o %i|%N|%b' line with a GPU request: job ID, node list, then
+# either "gpu:TYPE:COUNT" (preferred, e.g. "gres/gpu:a100-80g:2") or "gpu:COUNT" /
+# "gpu=COUNT" anywhere in the GRES field
+_SQUEUE_GPU_JOB_RE = re.compile(
+    r"^[ \t]*([^|\n]*?)[ \t]*\|[ \t]*([^|\n]*?)[ \t]*\|"
+    r"(?:[^\n]*?gpu:([^:,()\s]+):(\d+)|[^\n]*?gpu[:=](\d+))",
+    re.MULTILINE,
+)
+# One hostlist item, "prefix", or "prefix[ranges]suffix", and its separator
+_HOSTLIST_ITEM_RE = re.compile(r"([^\[\],]+)(?:\[([^\[\]]+)\]([^\[\],]*))?(?:,|$)")
+
+
+def get_node_info(include_down=False, refresh=False):
     """
     Extract detailed node information using 'scontrol show node'.
+
+    Results younger than NODE_CACHE_TTL seconds are served from the on-disk
+    cache; pass ``refresh=True`` to query SLURM regardless.
+    """
+    nodes = None if refresh else load_cached(cluster_key("nodes"), NODE_CACHE_TTL, path=NODE_CACHE_PATH)
+    if not isinstance(nodes, list):
+        nodes = _query_nodes()
+        save_cached(cluster_key("nodes"), nodes, path=NODE_CACHE_PATH)
+
+    if include_down:
+        return nodes
+    return [node for node in nodes if not node.get("Down")]
+
+
+def _query_nodes():
+    """Parse every node reported by 'scontrol show node', whatever its state."""
+    nodes = None
+    if not load_cached(cluster_key(_JSON_UNSUPPORTED_KEY), _JSON_UNSUPPORTED_TTL, path=NODE_CACHE_PATH):
+        nodes = _query_nodes_json()
+    if nodes is not None:
+        return nodes
+
+    try:
+        proc = subprocess.Popen(
+            ["scontrol", "show", "node", "-o"], stdout=subprocess.PIPE, bufsize=1 << 16
+        )
+    except FileNotFoundError:
+        raise RuntimeError("Command 'scontrol' not found. Please ensure SLURM is installed and added to PATH.")
+
+    # With -o scontrol prints one node per line, so each node can be parsed
+    # as soon as its line arrives, without reassembling multi-line blocks.
+    with proc:
+        nodes = []
+        for line in _iter_node_lines(proc.stdout):
+            node = parse_node_data(line)
+            if node:
+                nodes.append(node)
+    if proc.returncode:
+        raise RuntimeError(f"Error while executing scontrol: exit status {proc.returncode}")
+
+    return nodes
+
+
+def _iter_node_lines(lines):
+    """
+    Yield each node's line of 'scontrol show node -o' output as text,
+    skipping blank lines. ``lines`` are bytes.
+    """
+    for line in lines:
+        if line.strip():
+            yield line.decode()
+
+
+def _query_nodes_json():
+    """
+    Parse 'scontrol show node --json', or return None if this SLURM cannot.
     """
     try:
-        result = subprocess.check_output(["scontrol", "show", "node"], text=True).strip()
+        result = subprocess.check_output(
+            ["scontrol", "show", "node", "--json"], stderr=subprocess.PIPE
+        )
     except subprocess.CalledProcessError as e:
-        raise RuntimeError(f"Error while executing scontrol: {e.stderr}")
+        if _JSON_REJECTED_RE.search(e.stderr or b""):
+            # Older SLURM without --json: remember that, and stop asking.
+            save_cached(cluster_key(_JSON_UNSUPPORTED_KEY), True, path=NODE_CACHE_PATH)
+        return None
     except FileNotFoundError:
         raise RuntimeError("Command 'scontrol' not found. Please ensure SLURM is installed and added to PATH.")
 
-    # Each node's details are separated by a blank line
-    nodes_data = result.split("\n\n")
-    nodes = []
+    try:
+        data = json.loads(result)
+    except ValueError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("nodes"), list):
+        return None
 
-    for node_data in nodes_data:
-        node = parse_node_data(node_data)
+    nodes = []
+    for entry in data["nodes"]:
+        node = parse_node_json(entry)
         if node:
-            if not include_down and ('drain' in node["State"].lower() or 'down' in node["State"].lower()):
-                continue
             nodes.append(node)
-
     return nodes
 
 
-def parse_node_data(data):
+def _json_number(value):
+    """Unwrap the {"set", "infinite", "number"} objects used by newer data parsers."""
+    if isinstance(value, dict):
+        if value.get("infinite") or not value.get("set", True):
+            return 0
+        value = value.get("number")
+    return value if isinstance(value, (int, float)) else 0
+
+
+def parse_node_json(entry):
+    """
+    Parse information for a single node from 'scontrol show node --json' output.
+    """
+    if not isinstance(entry, dict) or not entry.get("name"):
+        return None
+    state = entry.get("state")
+    if isinstance(state, list):
+        state = "+".join(state)
+    partitions = entry.get("partitions")
+    if isinstance(partitions, list):
+        partitions = ",".join(partitions)
+    gres_used_match = _GRES_USED_GPU_RE.match(entry.get("gres_used") or "")
+    return _build_node(
+        node_name=entry["name"],
+        state=state or "UNKNOWN",
+        partitions=partitions or "UNKNOWN",
+        real_memory=int(_json_number(entry.get("real_memory"))),
+        alloc_memory=int(_json_number(entry.get("alloc_memory"))),
+        cpu_alloc=int(_json_number(entry.get("alloc_cpus"))),
+        cpu_total=int(_json_number(entry.get("cpus"))),
+        # scontrol reports the load average multiplied by 100
+        cpu_load=_json_number(entry.get("cpu_load")) / 100,
+        cfg_tres=entry.get("tres") or None,
+        alloc_tres=entry.get("tres_used") or None,
+        gres=entry.get("gres") or None,
+        gres_used_gpus=int(gres_used_match.group(1)) if gres_used_match else None,
+    )
+
+
+def parse_node_data(data, include_down=True):
     """
     Parse information for a single node from 'scontrol show node' output.
+
+    With ``include_down=False``, down or drained nodes are rejected (None)
+    straight after tokenizing, before any of the CPU, memory or GPU fields
+    are parsed.
     """
-    # Extract node name
-    node_name_match = re.search(r"NodeName=(\S+)", data)
-    if not node_name_match:
+    # scontrol prints whitespace-separated Key=Value pairs, so one pass over
+    # the tokens collects every field. Free text such as OS= or Reason= can
+    # add stray tokens; the first occurrence of a key wins.
+    fields = {}
+    for token in data.split():
+        key, sep, value = token.partition("=")
+        if sep and key not in fields:
+            fields[key] = value
+
+    node_name = fields.get("NodeName")
+    if not node_name:
+        return None
+    state = fields.get("State") or "UNKNOWN"
+    if not include_down and _is_down(state):
         return None
-    node_name = node_name_match.group(1)
+    gres_used_match = _GRES_USED_GPU_RE.match(fields.get("GresUsed", ""))
+    return _build_node(
+        node_name=node_name,
+        state=state,
+        partitions=fields.get("Partitions") or "UNKNOWN",
+        real_memory=_int_field(fields, "RealMemory"),
+        alloc_memory=_int_field(fields, "AllocMem"),
+        cpu_alloc=_int_field(fields, "CPUAlloc"),
+        cpu_total=_int_field(fields, "CPUTot"),
+        cpu_load=_float_field(fields, "CPULoad"),
+        cfg_tres=fields.get("CfgTRES"),
+        alloc_tres=fields.get("AllocTRES"),
+        gres=fields.get("Gres"),
+        gres_used_gpus=int(gres_used_match.group(1)) if gres_used_match else None,
+    )
 
-    # Extract memory details
-    real_memory_match = re.search(r"RealMemory=(\d+)", data)
-    alloc_memory_match = re.search(r"AllocMem=(\d+)", data)
-    real_memory = int(real_memory_match.group(1)) if real_memory_match else 0
-    alloc_memory = int(alloc_memory_match.group(1)) if alloc_memory_match else 0
-    memory_usage_percentage = (alloc_memory / real_memory) * 100 if real_memory > 0 else 0
 
-    # Extract CPU details
-    cpu_alloc_match = re.search(r"CPUAlloc=(\d+)", data)
-    cpu_total_match = re.search(r"CPUTot=(\d+)", data)
-    cpu_load_match = re.search(r"CPULoad=(\S+)", data)
-    cpu_alloc = int(cpu_alloc_match.group(1)) if cpu_alloc_match else 0
-    cpu_total = int(cpu_total_match.group(1)) if cpu_total_match else 0
-    cpu_load = float(cpu_load_match.group(1)) if cpu_load_match else 0.0
+def _is_down(state):
+    state_lower = state.lower()
+    return "drain" in state_lower or "down" in state_lower
+
+
+def _int_field(fields, key):
+    value = fields.get(key, "")
+    return int(value) if value.isdigit() else 0
+
+
+def _float_field(fields, key):
+    # CPULoad is "N/A" for nodes that are not responding
+    try:
+        return float(fields.get(key, ""))
+    except ValueError:
+        return 0.0
+
+
+def _tres_gpus(tres):
+    """
+    Return ``(gpu_count, {gpu_type: count})`` from a TRES string such as
+    "cpu=64,mem=191997M,gres/gpu=8,gres/gpu:3090=8".
+    """
+    gpu_count = 0
+    by_type = {}
+    for item in tres.split(","):
+        if item.startswith("gres/gpu="):
+            count = item[9:]
+            if count.isdigit():
+                gpu_count = int(count)
+        elif item.startswith("gres/gpu:"):
+            gpu_type, _, count = item[9:].partition("=")
+            if count.isdigit():
+                by_type[gpu_type] = int(count)
+    return gpu_count, by_type
+
+
+def _build_node(node_name, state, partitions, real_memory, alloc_memory, cpu_alloc,
+                cpu_total, cpu_load, cfg_tres, alloc_tres, gres, gres_used_gpus):
+    """
+    Build the node dict shared by the text and JSON scontrol parsers.
+    """
+    memory_usage_percentage = (alloc_memory / real_memory) * 100 if real_memory > 0 else 0
     cpu_usage_percentage = (cpu_alloc / cpu_total) * 100 if cpu_total > 0 else 0
 
     # Extract GPU details
@@ -75,39 +281,18 @@ def parse_node_data(data):
     gpu_alloc_by_type = {}  # {gpu_type: alloc_count}
 
     # Parse total GPU configuration from CfgTRES
-    cfg_tres_match = re.search(r"CfgTRES=([^\n]*)", data)
-    if cfg_tres_match:
-        cfg = cfg_tres_match.group(1)
-        m = re.search(r"gres/gpu=(\d+)", cfg)
-        if m:
-            gpu_total = int(m.group(1))
-        
-        # Extract GPU types and their total counts (e.g., gres/gpu:3090=2)
-        gpu_type_matches = re.findall(r"gres/gpu:([a-zA-Z0-9]+)=(\d+)", cfg)
-        for gpu_type, count in gpu_type_matches:
-            gpu_total_by_type[gpu_type] = int(count)
+    if cfg_tres:
+        gpu_total, gpu_total_by_type = _tres_gpus(cfg_tres)
 
     # Parse allocated GPUs from AllocTRES
-    alloc_tres_match = re.search(r"AllocTRES=([^\n]*)", data)
-    if alloc_tres_match:
-        alloc = alloc_tres_match.group(1)
-        # Extract total GPU allocation
-        m = re.search(r"gres/gpu=(\d+)", alloc)
-        if m:
-            gpu_alloc = int(m.group(1))
-        
-        # Extract specific GPU types and their allocated counts (e.g., gres/gpu:3090=2)
-        gpu_type_matches = re.findall(r"gres/gpu:([a-zA-Z0-9]+)=(\d+)", alloc)
-        for gpu_type, count in gpu_type_matches:
-            gpu_alloc_by_type[gpu_type] = int(count)
+    if alloc_tres:
+        gpu_alloc, gpu_alloc_by_type = _tres_gpus(alloc_tres)
 
     # Always try Gres field for GPU types (it usually has type info like gpu:3090:4)
-    gres_match = re.search(r"Gres=(\S+)", data)
-    if gres_match:
-        gres = gres_match.group(1)
+    if gres:
         # Parse gpu:TYPE:COUNT format (e.g., gpu:3090:4)
-        gres_type_matches = re.findall(r"gpu:([a-zA-Z0-9]+):(\d+)", gres)
-        for gpu_type, count in gres_type_matches:
+        for match in _GRES_GPU_TYPE_RE.finditer(gres):
+            gpu_type, count = match.groups()
             # Only set if not already parsed from CfgTRES
             if gpu_type not in gpu_total_by_type:
                 gpu_total_by_type[gpu_type] = int(count)
@@ -116,14 +301,12 @@ def parse_node_data(data):
         
         # Fallback: gpu:COUNT format (no type specified)
         if gpu_total == 0:
-            m = re.search(r"gpu[^:]*:(\d+)", gres)
+            m = _GRES_GPU_COUNT_RE.search(gres)
             if m:
                 gpu_total = int(m.group(1))
 
-    if gpu_alloc == 0:
-        gres_used_match = re.search(r"GresUsed=\S*?gpu:(\d+)", data)
-        if gres_used_match:
-            gpu_alloc = int(gres_used_match.group(1))
+    if gpu_alloc == 0 and gres_used_gpus:
+        gpu_alloc = gres_used_gpus
 
     # Calculate AVAILABLE GPUs by type (total - allocated)
     gpu_available_details = []
@@ -135,17 +318,10 @@ def parse_node_data(data):
             gpu_type_short = gpu_type[:10] if len(gpu_type) > 10 else gpu_type
             gpu_available_details.append(f"{gpu_type_short}={available_count}")
 
-    # Extract state
-    state_match = re.search(r"State=(\S+)", data)
-    state = state_match.group(1) if state_match else "UNKNOWN"
-
-    # Extract partitions
-    partitions_match = re.search(r"Partitions=(\S+)", data)
-    partitions = partitions_match.group(1) if partitions_match else "UNKNOWN"
-
     return {
         "NodeName": node_name,
         "State": state,
+        "Down": _is_down(state),
         "Partitions": partitions,
         "CPUs": f"{cpu_alloc} ({cpu_usage_percentage:.1f}%) / {cpu_total}",
         "Memory": f"{alloc_memory // 1024} GB ({memory_usage_percentage:.1f}%) / {real_memory // 1024} GB",
@@ -160,83 +336,53 @@ def parse_node_data(data):
 
 
 
-def get_job_gpu_mapping():
+def get_job_gpu_mapping(refresh=False):
     """
     Get mapping of jobs to nodes and their GPU allocations.
     Returns a dict: {node_name: [(job_id, gpu_type, gpu_count), ...]}
+
+    Like the node data, the mapping is cached for NODE_CACHE_TTL seconds;
+    pass ``refresh=True`` to query squeue regardless.
     """
+    cached = None if refresh else load_cached(cluster_key("job_gpus"), NODE_CACHE_TTL, path=NODE_CACHE_PATH)
+    if isinstance(cached, dict):
+        # JSON turned the tuples into lists
+        return {node: [tuple(job) for job in jobs] for node, jobs in cached.items()}
+    job_mapping = _query_job_gpu_mapping()
+    if job_mapping is None:
+        return {}
+    save_cached(cluster_key("job_gpus"), job_mapping, path=NODE_CACHE_PATH)
+    return job_mapping
+
+
+def _query_job_gpu_mapping():
+    """Build the job-to-GPU mapping from squeue, or return None if squeue fails."""
     try:
         # Query squeue for job ID, node list, and GRES (GPU) allocation
         # Format: JobID|NodeList|TRES_PER_NODE or GRES
         result = subprocess.check_output(
             ["squeue", "-h", "-t", "R", "-o", "%i|%N|%b"],
             text=True,
-            stderr=subprocess.PIPE
+            stderr=subprocess.DEVNULL
         ).strip()
     except (subprocess.CalledProcessError, FileNotFoundError):
-        return {}
-    
-    if not result:
-        return {}
+        return None
     
     job_mapping = {}
     
-    for line in result.split('\n'):
-        if not line.strip():
-            continue
-        
-        parts = line.split('|')
-        if len(parts) < 3:
-            continue
-        
-        job_id = parts[0].strip()
-        node_list = parts[1].strip()
-        gres = parts[2].strip()
-        
-        # Parse GPU type and count from GRES
-        # Formats: "gpu:3090:2", "gpu:2", "gres/gpu:3090=2", "gres/gpu=2"
-        gpu_count = 0
-        gpu_type = "gpu"  # Default type if not specified
-        
-        # Try to match "gpu:TYPE:COUNT" format (e.g., "gpu:3090:2")
-        gpu_type_match = re.search(r'gpu:([a-zA-Z0-9]+):(\d+)', gres)
-        if gpu_type_match:
-            gpu_type = gpu_type_match.group(1)
-            gpu_count = int(gpu_type_match.group(2))
+    # One scan over the whole output; lines without GPUs simply do not match.
+    for match in _SQUEUE_GPU_JOB_RE.finditer(result):
+        job_id, node_list, typed_type, typed_count, count = match.groups()
+        if typed_count is not None:
+            gpu_type, gpu_count = typed_type, int(typed_count)
         else:
-            # Try to match "gpu:COUNT" format (e.g., "gpu:2")
-            gpu_match = re.search(r'gpu[:\=](\d+)', gres)
-            if gpu_match:
-                gpu_count = int(gpu_match.group(1))
+            gpu_type, gpu_count = "gpu", int(count)  # Default type if not specified
         
         # If no GPU allocation found, skip this job
         if gpu_count == 0:
             continue
         
-        # Parse node list - handle single node or node ranges
-        # Examples: "node01", "node[01-03]", "node01,node02"
-        nodes = []
-        if '[' in node_list:
-            # Handle node range format like "hgpn[01-03,05]"
-            base_match = re.match(r'([a-zA-Z]+)\[([^\]]+)\]', node_list)
-            if base_match:
-                base_name = base_match.group(1)
-                range_part = base_match.group(2)
-                
-                for part in range_part.split(','):
-                    if '-' in part:
-                        # Range like "01-03"
-                        start, end = part.split('-')
-                        # Preserve leading zeros
-                        width = len(start)
-                        for i in range(int(start), int(end) + 1):
-                            nodes.append(f"{base_name}{str(i).zfill(width)}")
-                    else:
-                        # Single number
-                        nodes.append(f"{base_name}{part}")
-        else:
-            # Simple comma-separated list or single node
-            nodes = [n.strip() for n in node_list.split(',')]
+        nodes = _expand_nodelist(node_list)
         
         # Distribute GPUs across nodes (assume equal distribution)
         gpus_per_node = gpu_count // len(nodes) if nodes else gpu_count
@@ -254,35 +400,128 @@ def get_job_gpu_mapping():
 
 
 
-def color_state(state):
+@functools.lru_cache(maxsize=512)
+def _expand_nodelist(node_list):
     """
-    Add color to node states for better readability.
+    Expand a SLURM hostlist such as "hgpn[01-03,05]" into node names.
+
+    Common forms are expanded in-process; only syntax _expand_nodelist_locally
+    cannot parse goes through 'scontrol show hostnames'.
     """
-    state_lower = state.lower()
-    if "idle" in state_lower:
-        return colored(state, "green", attrs=["bold"])
-    elif "mix" in state_lower:
-        return colored(state, "yellow", attrs=["bold"])
-    elif "drain" in state_lower or "down" in state_lower:
-        return colored(state, "red", attrs=["bold"])
-    else:
-        return colored(state, "cyan", attrs=["bold"])
+    nodes = _expand_nodelist_locally(node_list)
+    if nodes is not None:
+        return nodes
+    try:
+        result = subprocess.check_output(
+            ["scontrol", "show", "hostnames", node_list], stderr=subprocess.DEVNULL
+        )
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        return ()
+    return tuple(result.decode().split())
 
 
-def display_nodes(nodes, slots=8, show_job_ids=True):
+def _expand_nodelist_locally(node_list):
+    """
+    Expand comma-separated "name" and "prefix[a-b,c]suffix" items, or return
+    None for other hostlist syntax (several bracket groups, steps, ...).
+    """
+    nodes = []
+    pos = 0
+    while pos < len(node_list):
+        item = _HOSTLIST_ITEM_RE.match(node_list, pos)
+        if not item:
+            return None
+        prefix, ranges, suffix = item.groups()
+        pos = item.end()
+        if ranges is None:
+            nodes.append(prefix)
+            continue
+        for part in ranges.split(','):
+            bounds = part.split('-')
+            if len(bounds) > 2 or not all(b.isdigit() for b in bounds):
+                return None
+            # Preserve leading zeros
+            width = len(bounds[0])
+            for i in range(int(bounds[0]), int(bounds[-1]) + 1):
+                nodes.append(f"{prefix}{str(i).zfill(width)}{suffix}")
+    return tuple(nodes)
+
+
+# Colour per base state token. A compound state such as "IDLE+DRAIN" takes
+# the first colour of _STATE_PRIORITY found among its tokens; unknown
+# states are cyan.
+_STATE_COLOURS = {
+    "IDLE": "green",
+    "MIX": "yellow",
+    "MIXED": "yellow",
+    "DRAIN": "red",
+    "DRAINED": "red",
+    "DRAINING": "red",
+    "UNDRAIN": "red",
+    "DOWN": "red",
+    "POWER_DOWN": "red",
+    "POWERED_DOWN": "red",
+    "POWERING_DOWN": "red",
+}
+_STATE_PRIORITY = ("green", "yellow", "red")
+# Flags scontrol appends to a state, e.g. "DOWN*" (not responding).
+_STATE_FLAGS = "*~#!%$@^-"
+
+
+# Bold ANSI colours, written out so colouring a state is one f-string.
+_STATE_ANSI = {
+    "green": "\x1b[1;32m",
+    "yellow": "\x1b[1;33m",
+    "red": "\x1b[1;31m",
+    "cyan": "\x1b[1;36m",
+}
+_ANSI_RESET = "\x1b[0m"
+
+
+@functools.lru_cache(maxsize=64)
+def _ansi_state(state):
+    found = {
+        _STATE_COLOURS.get(token.rstrip(_STATE_FLAGS).upper())
+        for token in state.split("+")
+    }
+    color = next((c for c in _STATE_PRIORITY if c in found), "cyan")
+    return f"{_STATE_ANSI[color]}{state}{_ANSI_RESET}"
+
+
+def _plain_state(state):
+    return state
+
+
+# Add color to node states for better readability. Rebound by set_color.
+color_state = _ansi_state
+
+
+def set_color(enabled):
+    """
+    Turn colour output on or off for the whole module, so per-node code never
+    has to check. Colour starts enabled only for a terminal without NO_COLOR
+    (https://no-color.org); winfo --no-color turns it off.
+    """
+    global color_state, colored
+    color_state = _ansi_state if enabled else _plain_state
+    colored = _termcolor_colored if enabled else _plain_colored
+
+
+set_color(sys.stdout.isatty() and not os.environ.get("NO_COLOR"))
+
+
+def display_nodes(nodes, slots=8, show_job_ids=True, graph=True):
     """
     Display node information in a table format, including detailed info and a
-    GPU usage graph with job IDs.
+    GPU usage graph by GPU type. ``show_job_ids`` and ``graph`` are accepted
+    for compatibility; per-job details are shown by ``winfo --job``.
     """
     if not nodes:
         print("No node information to display.")
         return
 
-    # Get job-to-GPU mapping
-    job_mapping = get_job_gpu_mapping() if show_job_ids else {}
-    
     # Determine max GPU slots for the table
-    max_slots = max([n.get("GPUTot", 0) for n in nodes] + [slots])
+    max_slots = max(max((n.get("GPUTot", 0) for n in nodes), default=0), slots)
     
     # Define table headers
     titles = ["NodeName", "State", "Partitions", "CPUs", "Memory", "GPUs"]
@@ -290,8 +529,8 @@ def display_nodes(nodes, slots=8, show_job_ids=True):
     for i in range(max_slots):
         titles.append(f" #{i+1} ")
     
-    # Add %CPU column at the end
-    titles.append("%CPU")
+    # Add CPU load column at the end
+    titles.append("CPUld")
 
     rows = []
     for node in nodes:
@@ -311,7 +550,6 @@ def display_nodes(nodes, slots=8, show_job_ids=True):
             gpu_info = "N/A"
         
         # Build GPU slot visualization using node's GPU allocation by type
-        gpu_slots = []
         gpu_alloc_by_type = node.get("GPUAllocByType", {})
         
         if gpu_alloc_by_type:
@@ -319,36 +557,17 @@ def display_nodes(nodes, slots=8, show_job_ids=True):
             slot_assignments = []
             for gpu_type, count in gpu_alloc_by_type.items():
                 # Use first 4 characters of GPU type
-                gpu_abbrev = gpu_type[:4] if len(gpu_type) >= 4 else gpu_type
-                for _ in range(count):
-                    slot_assignments.append(gpu_abbrev)
+                slot_assignments.extend([gpu_type[:4]] * count)
             
-            # Fill GPU slots
-            for i in range(max_slots):
-                if i < len(slot_assignments):
-                    # Show GPU type abbreviation in this slot
-                    gpu_slots.append(slot_assignments[i])
-                elif i < gpu_total:
-                    # Available but unused GPU
-                    gpu_slots.append("")
-                else:
-                    # No GPU slot
-                    gpu_slots.append("")
+            # Show the GPU type abbreviation in each allocated slot
+            gpu_slots = slot_assignments[:max_slots]
         else:
             # Fallback to simple # visualization if no GPU type info
-            used = min(gpu_alloc, gpu_total)
-            for i in range(max_slots):
-                if i < used:
-                    gpu_slots.append("#")
-                elif i < gpu_total:
-                    gpu_slots.append("")
-                else:
-                    gpu_slots.append("")
+            gpu_slots = ["#"] * min(gpu_alloc, gpu_total, max_slots)
 
-        
-        # Ensure we have exactly max_slots elements
-        while len(gpu_slots) < max_slots:
-            gpu_slots.append("")
+        # Free and missing GPU slots are both left blank, padding the row
+        # to exactly max_slots cells
+        gpu_slots += [""] * (max_slots - len(gpu_slots))
         
         # Format CPU load percentage
         cpu_load_str = f"{cpu_load:.2f}"
@@ -360,26 +579,32 @@ def display_nodes(nodes, slots=8, show_job_ids=True):
             node["CPUs"],
             node["Memory"],
             gpu_info,
-            *gpu_slots[:max_slots],
+            *gpu_slots,
             cpu_load_str
         ])
 
-    table = AsciiTable([titles] + rows)
-    for i in range(len(titles)):
-        table.justify_columns[i] = "left"
-    table.justify_columns[0] = "right"
-
-    output = table.table
+    output = render_table([titles] + rows, justify={0: "right"})
     print(output)
     return output
 
 
 
-def show_job_detail(job_id):
+def show_job_detail(job_id, refresh=False):
     """
     Show detailed GPU usage information for a specific job.
     """
-    job_mapping = get_job_gpu_mapping()
+    # Start the per-job squeue first so it runs while the GPU mapping is built
+    try:
+        detail_proc = subprocess.Popen(
+            ["squeue", "-j", str(job_id), "-h", "-o", "%i|%j|%u|%T|%M|%l|%b"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+    except FileNotFoundError:
+        detail_proc = None
+
+    job_mapping = get_job_gpu_mapping(refresh=refresh)
     
     # Find which nodes this job is running on
     nodes_with_job = []
@@ -389,6 +614,8 @@ def show_job_detail(job_id):
                 nodes_with_job.append((node_name, gpu_count))
     
     if not nodes_with_job:
+        if detail_proc is not None:
+            detail_proc.communicate()
         print(f"Job {job_id} not found or not using GPUs.")
         return
     
@@ -397,14 +624,10 @@ def show_job_detail(job_id):
     print()
     
     # Get job details from squeue
-    try:
-        result = subprocess.check_output(
-            ["squeue", "-j", str(job_id), "-h", "-o", "%i|%j|%u|%T|%M|%l|%b"],
-            text=True,
-            stderr=subprocess.PIPE
-        ).strip()
+    if detail_proc is not None:
+        result = detail_proc.communicate()[0].strip()
         
-        if result:
+        if detail_proc.returncode == 0 and result:
             parts = result.split('|')
             if len(parts) >= 7:
                 job_name = parts[1].strip()
@@ -421,8 +644,6 @@ def show_job_detail(job_id):
                 print(f"  Time Limit: {timelimit}")
                 print(f"  GRES:       {gres}")
                 print()
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        pass
     
     # Show GPU allocation details
     print(colored("GPU Allocation:", "yellow", attrs=["bold"]))
@@ -438,10 +659,7 @@ def show_job_detail(job_id):
     for node_name, gpu_count in nodes_with_job:
         rows.append([node_name, str(gpu_count)])
     
-    table = AsciiTable([titles] + rows)
-    table.justify_columns[0] = "left"
-    table.justify_columns[1] = "center"
-    print(table.table)
+    print(render_table([titles] + rows, justify={1: "center"}))
 
 
 def main():
@@ -467,20 +685,32 @@ def main():
         default=8,
         help="Minimum number of GPU slots to display (default: 8)."
     )
+    parser.add_argument(
+        "--refresh-cache",
+        action="store_true",
+        help=f"Query SLURM even if node data cached less than {NODE_CACHE_TTL}s ago exists.",
+    )
+    parser.add_argument(
+        "--no-color",
+        action="store_true",
+        help="Print plain text without ANSI colours (also the default when not writing to a terminal).",
+    )
     parser.add_argument(
         "--job",
         type=str,
         help="Show detailed GPU usage for a specific job ID."
     )
     args = parser.parse_args()
+    if args.no_color:
+        set_color(False)
 
     try:
         if args.job:
             # Show detailed information for a specific job
-            show_job_detail(args.job)
+            show_job_detail(args.job, refresh=args.refresh_cache)
         else:
             # Show node information table
-            nodes = get_node_info(include_down=args.include_down)
+            nodes = get_node_info(include_down=args.include_down, refresh=args.refresh_cache)
             display_nodes(nodes, slots=args.slots)
     except RuntimeError as e:
         print(f"Error: {e}")
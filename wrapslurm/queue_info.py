@@ -1,15 +1,29 @@
+import csv
+import functools
 import subprocess
 import getpass
 import grp
-from terminaltables import AsciiTable
-from termcolor import colored
 import os
+import shutil
 import sys
 import re
 
+from wrapslurm.table import render_table
+
 MAX_NAME_LENGTH = 30  # Maximum length for the job name
 
 
+@functools.lru_cache(maxsize=None)
+def _termcolor():
+    """Import termcolor on first use rather than at import time."""
+    from termcolor import colored as termcolor_colored
+    return termcolor_colored
+
+
+def colored(text, *args, **kwargs):
+    return _termcolor()(text, *args, **kwargs)
+
+
 def parse_slurm_time(time_str):
     """
     Parse SLURM time format and return total minutes.
@@ -85,13 +99,19 @@ def truncate_name(name, max_length):
     return name
 
 
+@functools.lru_cache(maxsize=None)
+def _which(command):
+    """shutil.which, looked up once per command."""
+    return shutil.which(command)
+
+
 def run_command(cmd, shell=False):
     """Run a shell command and return its output."""
     try:
         if shell:
-            output = subprocess.check_output(cmd, stderr=subprocess.PIPE, shell=True, text=True)
+            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, shell=True, text=True)
         else:
-            output = subprocess.check_output(cmd, stderr=subprocess.PIPE, text=True)
+            output = subprocess.check_output(cmd, stderr=subprocess.DEVNULL, text=True)
         return output.strip()
     except subprocess.CalledProcessError:
         return ""
@@ -99,6 +119,27 @@ def run_command(cmd, shell=False):
         return ""
 
 
+# Patterns for `scontrol show job`, squeue and sacctmgr output, compiled once
+# since they run once per job.
+_TRES_GPU_TOTAL_RE = re.compile(r"gres/gpu[=:](\d+)")
+_TRES_GPU_TYPED_RE = re.compile(r"gres/gpu:[a-zA-Z][a-zA-Z0-9]*[=:](\d+)")
+_TRES_FIELD_RES = {
+    field: re.compile(field + r"=(\S+)")
+    for field in ("AllocTRES", "ReqTRES", "TresPerNode", "TresPerTask", "TresPerSocket", "TresPerJob")
+}
+_NUM_NODES_RE = re.compile(r"NumNodes=(\d+)")
+_NUM_TASKS_RE = re.compile(r"NumTasks=(\d+)")
+_GRES_FIELD_RE = re.compile(r"(?:^|\s)Gres=(\S+)")
+_GRES_GPU_RE = re.compile(r"gpu(?::[a-zA-Z0-9]+)?:(\d+)")
+_NUM_CPUS_RE = re.compile(r"NumCPUs=(\d+)")
+_MIN_MEMORY_NODE_RE = re.compile(r"MinMemoryNode=(\d+)([KMGT]?)")
+_MIN_MEMORY_CPU_RE = re.compile(r"MinMemoryCPU=(\d+)([KMGT]?)")
+_MEMORY_RE = re.compile(r"(\d+)([KMGT]?)")
+_QOS_GPU_LIMIT_RE = re.compile(r"gres/gpu=(\d+)")
+_SCONTROL_JOB_ID_RE = re.compile(r"JobId=(\d+)")
+_SCONTROL_ARRAY_RE = re.compile(r"ArrayJobId=(\d+) ArrayTaskId=(\S+)")
+
+
 def _gpu_count_in_tres(tres):
     """
     Return the GPU count encoded in a single TRES value (the right-hand side of
@@ -110,11 +151,11 @@ def _gpu_count_in_tres(tres):
         return 0
     # Generic aggregate total: 'gres/gpu=N' (ReqTRES/AllocTRES) or
     # 'gres/gpu:N' (TresPer* per-unit form, no GPU type).
-    m = re.search(r"gres/gpu[=:](\d+)", tres)
+    m = _TRES_GPU_TOTAL_RE.search(tres)
     if m:
         return int(m.group(1))
     # Typed entries: 'gres/gpu:<type>=N' or 'gres/gpu:<type>:N' — sum all types.
-    typed = re.findall(r"gres/gpu:[a-zA-Z][a-zA-Z0-9]*[=:](\d+)", tres)
+    typed = _TRES_GPU_TYPED_RE.findall(tres)
     if typed:
         return sum(int(x) for x in typed)
     return 0
@@ -139,18 +180,18 @@ def parse_gpu_count_from_scontrol(output):
 
     # 1. Aggregate totals: AllocTRES (running jobs) then ReqTRES (pending jobs).
     for field in ("AllocTRES", "ReqTRES"):
-        m = re.search(field + r"=(\S+)", output)
+        m = _TRES_FIELD_RES[field].search(output)
         if m:
             gpus = _gpu_count_in_tres(m.group(1))
             if gpus:
                 return gpus
 
     def _int_field(pattern, default=1):
-        m = re.search(pattern, output)
+        m = pattern.search(output)
         return int(m.group(1)) if m else default
 
-    num_nodes = _int_field(r"NumNodes=(\d+)")
-    num_tasks = _int_field(r"NumTasks=(\d+)")
+    num_nodes = _int_field(_NUM_NODES_RE)
+    num_tasks = _int_field(_NUM_TASKS_RE)
 
     # 2. Per-node / per-task / per-socket / per-job specifications
     #    (e.g. --gpus-per-node / --gpus-per-task, which never land in ReqTRES).
@@ -160,47 +201,115 @@ def parse_gpu_count_from_scontrol(output):
         ("TresPerSocket", 1),
         ("TresPerJob", 1),
     ):
-        m = re.search(field + r"=(\S+)", output)
+        m = _TRES_FIELD_RES[field].search(output)
         if m:
             gpus = _gpu_count_in_tres(m.group(1))
             if gpus:
                 return gpus * multiplier
 
     # 3. Gres=gpu[:type]:N (reported per node in some SLURM versions).
-    m = re.search(r"(?:^|\s)Gres=(\S+)", output)
+    m = _GRES_FIELD_RE.search(output)
     if m and m.group(1) not in ("(null)", "(none)"):
-        gm = re.search(r"gpu(?::[a-zA-Z0-9]+)?:(\d+)", m.group(1))
+        gm = _GRES_GPU_RE.search(m.group(1))
         if gm:
             return int(gm.group(1)) * num_nodes
 
     return 0
 
 
+@functools.lru_cache(maxsize=512)
+def _scontrol_show_job(job_id):
+    """`scontrol show job` output for one job, fetched once per process."""
+    return run_command(["scontrol", "show", "job", job_id])
+
+
 def get_job_gpu_req(job_id):
     """Parse scontrol to find GPU requirements for a job."""
-    output = run_command(["scontrol", "show", "job", str(job_id)])
+    output = _scontrol_show_job(str(job_id))
     return parse_gpu_count_from_scontrol(output)
 
 
+def get_jobs_scontrol(job_ids):
+    """
+    Return {job_id: record} with the `scontrol show job` record of each job.
+    scontrol accepts only one job ID, so several jobs are looked up with one
+    call each, run side by side, rather than listing every job on the
+    cluster. Jobs scontrol does not know are missing.
+    """
+    wanted = {str(job_id) for job_id in job_ids}
+    if not wanted:
+        return {}
+    # Pending array tasks (123_[5-9]) are looked up through the array's ID
+    cmds = [
+        ["scontrol", "-o", "show", "job", query_id]
+        for query_id in sorted({job_id.split("_[", 1)[0] for job_id in wanted})
+    ]
+    if len(cmds) == 1:
+        outputs = [run_command(cmds[0])]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=min(8, len(cmds))) as executor:
+            outputs = list(executor.map(run_command, cmds))
+
+    records = {}
+    for record in "\n".join(outputs).splitlines():
+        m = _SCONTROL_JOB_ID_RE.match(record)
+        if not m:
+            continue
+        keys = [m.group(1)]
+        # squeue reports array tasks as 123_4, or 123_[5-9] while pending
+        array = _SCONTROL_ARRAY_RE.search(record)
+        if array:
+            array_id, task_id = array.groups()
+            keys.append(f"{array_id}_{task_id}" if task_id.isdigit() else f"{array_id}_[{task_id}]")
+        for key in keys:
+            if key in wanted:
+                records[key] = record
+    return records
+
+
+def get_jobs_gpu_req(job_ids):
+    """Return {job_id: GPU count} for the given jobs, via get_jobs_scontrol."""
+    return {
+        job_id: parse_gpu_count_from_scontrol(record)
+        for job_id, record in get_jobs_scontrol(job_ids).items()
+    }
+
+
 def get_job_resources(job_id):
     """
     Get comprehensive resource information for a job (CPU, Memory, GPU).
     Returns a tuple (resource_string, gpu_count), e.g. ("4C/16G/2G", 2)
     for 4 CPUs, 16GB RAM and 2 GPUs. gpu_count is 0 for CPU-only jobs.
     """
-    output = run_command(["scontrol", "show", "job", str(job_id)])
+    output = _scontrol_show_job(str(job_id))
     if not output:
         return "N/A", 0
 
     # Parse CPUs
-    cpus_match = re.search(r"NumCPUs=(\d+)", output)
+    cpus_match = _NUM_CPUS_RE.search(output)
     cpus = int(cpus_match.group(1)) if cpus_match else 0
     
     # Parse Memory (MinMemoryNode or MinMemoryCPU)
-    mem_match = re.search(r"MinMemoryNode=(\d+)([KMGT]?)", output)
+    mem_match = _MIN_MEMORY_NODE_RE.search(output)
     if not mem_match:
-        mem_match = re.search(r"MinMemoryCPU=(\d+)([KMGT]?)", output)
-    
+        mem_match = _MIN_MEMORY_CPU_RE.search(output)
+    memory = mem_match.group(1) + mem_match.group(2) if mem_match else ""
+
+    # Parse GPUs (reuse the scontrol output already fetched above)
+    gpu_count = parse_gpu_count_from_scontrol(output)
+
+    return format_resources(cpus, memory, gpu_count), gpu_count
+
+
+def format_resources(cpus, memory, gpu_count):
+    """
+    Build the compact resource string shown by wq, e.g. "4C/16G/2G", from a
+    CPU count, a SLURM memory size such as "16G" or "4000M" (MB when it has
+    no unit; empty if unknown) and a GPU count.
+    """
+    mem_match = _MEMORY_RE.match(memory)
     if mem_match:
         mem_value = int(mem_match.group(1))
         mem_unit = mem_match.group(2) if mem_match.group(2) else 'M'
@@ -224,9 +333,6 @@ def get_job_resources(job_id):
             mem_str = f"{int(mem_value)}M"
     else:
         mem_str = "0"
-    
-    # Parse GPUs (reuse the scontrol output already fetched above)
-    gpu_count = parse_gpu_count_from_scontrol(output)
 
     # Build compact resource string
     parts = []
@@ -237,24 +343,40 @@ def get_job_resources(job_id):
     if gpu_count > 0:
         parts.append(f"{gpu_count}G")
 
-    resource_str = "/".join(parts) if parts else "N/A"
-    return resource_str, gpu_count
+    return "/".join(parts) if parts else "N/A"
+
+
+def squeue_gpu_count(tres_per_node, node_count):
+    """
+    Return the GPUs a job asks for according to squeue's %b (TRES per node,
+    e.g. "gres/gpu:4" or "gres:gpu:a100:2") and %D (node count), or None when
+    %b names no GPUs: the job may still request them per job or per task,
+    which only `scontrol show job` shows.
+    """
+    if not tres_per_node or tres_per_node == "N/A":
+        return None
+    per_node = _gpu_count_in_tres(tres_per_node)
+    if not per_node:
+        m = _GRES_GPU_RE.search(tres_per_node)
+        if not m:
+            return None
+        per_node = int(m.group(1))
+    return per_node * int(node_count) if node_count.isdigit() else per_node
 
 
 
+@functools.lru_cache(maxsize=None)
 def get_user_gpu_running(user):
-    """Calculate total GPUs currently running for a user."""
+    """
+    Calculate total GPUs currently running for a user. The count is computed
+    once per user for the lifetime of the process (one wq invocation).
+    """
     # Get all running job IDs for the user
     output = run_command(["squeue", "-u", user, "-t", "R", "-h", "-o", "%i"])
     if not output:
         return 0
     
-    total_gpu = 0
-    job_ids = output.split()
-    for jid in job_ids:
-        total_gpu += get_job_gpu_req(jid)
-    
-    return total_gpu
+    return sum(get_jobs_gpu_req(output.split()).values())
 
 
 def get_user_pending_jobs(user):
@@ -265,21 +387,31 @@ def get_user_pending_jobs(user):
     return output.split()
 
 
-def analyze_pending_job_brief(job_id, user):
+# squeue fields analyze_pending_job_brief reads for a job
+PENDING_SQUEUE_FORMAT = "%i|%P|%j|%T|%M|%l|%D|%R|%C|%m|%b"
+
+
+def analyze_pending_job_brief(job_id, user, squeue_parts=None, scontrol_record=None, user_gpu_running=None):
     """
     Display a brief analysis panel for a pending job.
     Shows key information in a compact table format.
+
+    show_squeue passes the job's squeue fields (PENDING_SQUEUE_FORMAT), its
+    `scontrol show job` record and the user's running GPU count, so that no
+    SLURM command runs per job; whatever is not passed is queried here. The
+    scontrol record is only needed when squeue's %b does not show the GPUs.
     """
-    from terminaltables import AsciiTable
-    
     # Get job details from squeue
-    squeue_out = run_command(["squeue", "-j", str(job_id), "-h", "-o", "%i|%P|%j|%T|%M|%l|%D|%R"])
-    if not squeue_out:
-        print(colored(f"  Job {job_id}: Not found in queue", "red"))
-        return
-    
-    parts = squeue_out.split('|')
-    if len(parts) < 8:
+    if squeue_parts is None:
+        squeue_out = run_command(["squeue", "-j", str(job_id), "-h", "-o", PENDING_SQUEUE_FORMAT])
+        if not squeue_out:
+            print(colored(f"  Job {job_id}: Not found in queue", "red"))
+            return
+        # %b is the last of the 11 fields
+        squeue_parts = squeue_out.split('|', 10)
+
+    parts = squeue_parts
+    if len(parts) < 11:
         print(colored(f"  Job {job_id}: Unable to parse job info", "red"))
         return
     
@@ -290,20 +422,15 @@ def analyze_pending_job_brief(job_id, user):
     time_limit = parts[5].strip()
     nodes = parts[6].strip()
     reason = parts[7].strip()
-    
-    # Get GPU requirements
-    gpu_req = get_job_gpu_req(job_id)
-    
-    # Get scontrol details for more info
-    scontrol_out = run_command(["scontrol", "show", "job", str(job_id)])
-    
-    # Parse CPUs per task
-    cpus_match = re.search(r"NumCPUs=(\d+)", scontrol_out)
-    cpus = cpus_match.group(1) if cpus_match else "N/A"
-    
-    # Parse memory
-    mem_match = re.search(r"MinMemoryNode=(\d+\w?)", scontrol_out)
-    memory = mem_match.group(1) if mem_match else "N/A"
+    cpus = parts[8].strip() or "N/A"
+    memory = parts[9].strip() or "N/A"
+
+    # GPU requirements, from scontrol only if squeue's %b does not name them
+    gpu_req = squeue_gpu_count(parts[10].strip(), nodes)
+    if gpu_req is None:
+        if scontrol_record is None:
+            scontrol_record = _scontrol_show_job(str(job_id))
+        gpu_req = parse_gpu_count_from_scontrol(scontrol_record)
     
     # Build the panel rows
     rows = [
@@ -321,17 +448,15 @@ def analyze_pending_job_brief(job_id, user):
     ]
     
     # Create table
-    table = AsciiTable(rows)
-    table.title = colored(f" Job {job_id} ", "cyan", attrs=["bold"])
-    table.justify_columns[0] = 'right'
-    table.justify_columns[1] = 'left'
-    print(table.table)
+    title = colored(f" Job {job_id} ", "cyan", attrs=["bold"])
+    print(render_table(rows, justify={0: "right"}, title=title))
     
     # Additional analysis for specific reasons
     reason_upper = reason.upper()
     
     if "QOSMAXGRESPERUSER" in reason_upper:
-        user_gpu_running = get_user_gpu_running(user)
+        if user_gpu_running is None:
+            user_gpu_running = get_user_gpu_running(user)
         total_if_run = user_gpu_running + gpu_req
         print(colored("  ⚠ GPU Limit Exceeded:", "red", attrs=["bold"]))
         print(f"    Running GPUs: {colored(str(user_gpu_running), 'green')} | "
@@ -358,7 +483,7 @@ def analyze_job(job_id):
     print(colored("[1] Current status from squeue", "yellow"))
     print("-" * 20)
 
-    squeue_out = run_command(["squeue", "-j", str(job_id), "-h", "-o", "%i %t %T %M %R"])
+    squeue_out = run_command(["squeue", "-j", str(job_id), "-h", "-o", "%i %t %T %M %u %R"])
 
     if not squeue_out:
         print(colored("Job not found in squeue. It may be completed, failed, or purged from queue.", "red"))
@@ -370,26 +495,28 @@ def analyze_job(job_id):
         sacct_out = run_command(sacct_cmd)
         if sacct_out:
              # Pretty print sacct output (replace | with spacing)
-             header = sacct_out.split('\n')[0].replace('|', '  ')
+             lines = sacct_out.splitlines()
+             header = lines[0].replace('|', '  ')
              print(colored(header, attrs=['bold']))
-             for line in sacct_out.split('\n')[1:]:
+             for line in lines[1:]:
                  print(line.replace('|', '  '))
         else:
             print("No info found in sacct.")
         return
 
     parts = squeue_out.split()
-    # squeue output format: JobID StateShort StateLong Time Reason/Node
+    # squeue output format: JobID StateShort StateLong Time User Reason/Node
     # Caution: Reason can contain spaces? Usually %R is last, so remainder is reason.
     # But split() might break it. Let's rely on fixed fields if possible or careful split.
     # The bash script uses awk column logic.
-    # %i %t %T %M %R
-    # jobid st ST time reason
+    # %i %t %T %M %u %R
+    # jobid st ST time user reason
     
     job_state_short = parts[1]
     job_state_long = parts[2]
     job_time = parts[3]
-    job_reason = " ".join(parts[4:])
+    job_user = parts[4]
+    job_reason = " ".join(parts[5:])
 
     print(f"  State(short): {colored(job_state_short, attrs=['bold'])}")
     print(f"  State(long) : {colored(job_state_long, attrs=['bold'])}")
@@ -404,7 +531,7 @@ def analyze_job(job_id):
     if job_state_short == "R":
         print("Job is RUNNING.")
         print("Showing more details from scontrol:")
-        print(run_command(["scontrol", "show", "job", str(job_id)]))
+        print(_scontrol_show_job(str(job_id)))
 
     elif job_state_short == "PD":
         print(colored("Job is PENDING.", "yellow"))
@@ -438,13 +565,20 @@ def analyze_job(job_id):
             print("Starting this job would exceed your total GPU limit.")
             print()
 
-            # Get User ID from scontrol
-            scontrol_out = run_command(["scontrol", "show", "job", str(job_id)])
-            user_match = re.search(r"UserId=([a-z0-9_]+)", scontrol_out)
-            job_user = user_match.group(1) if user_match else "unknown"
-
-            job_gpu_req = get_job_gpu_req(job_id)
-            user_gpu_running = get_user_gpu_running(job_user)
+            # The job's GPU request, the user's running GPUs and the QOS
+            # limits are independent SLURM queries; run them side by side.
+            from concurrent.futures import ThreadPoolExecutor
+
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                job_gpu_future = executor.submit(get_job_gpu_req, job_id)
+                running_future = executor.submit(get_user_gpu_running, job_user)
+                sacctmgr_future = None
+                if _which("sacctmgr"):
+                    sacctmgr_future = executor.submit(
+                        run_command, ["sacctmgr", "show", "qos", "-nP", "format=Name,MaxTRESPerUser"]
+                    )
+            job_gpu_req = job_gpu_future.result()
+            user_gpu_running = running_future.result()
             total_if_run = user_gpu_running + job_gpu_req
 
             print(f"  User: {colored(job_user, attrs=['bold'])}")
@@ -455,31 +589,27 @@ def analyze_job(job_id):
             print(f"  The limit L satisfies: {user_gpu_running} <= L < {total_if_run}")
             print()
             
-            # Try sacctmgr for exact limit
-            try:
-                # Mocking check for sacctmgr existence by running it
-                sacctmgr_out = run_command(["sacctmgr", "show", "qos", "-nP", "format=Name,MaxTRESPerUser"])
-                # Output format: Name|MaxTRESPerUser
-                # We need to find the relevant line. Since we don't know which QOS, we might look for any that has GPU limit?
-                # The bash script just grep gpu.
-                # Let's try to extract any gpu limit
-                if sacctmgr_out:
-                    gpu_limits = re.findall(r"gres/gpu=(\d+)", sacctmgr_out)
-                    if gpu_limits:
-                        limit_gpu = int(gpu_limits[0]) # Start with the first one found, better than nothing
-                        over_by = total_if_run - limit_gpu
-                        print(colored("  [sacctmgr Estimate]", "cyan"))
-                        print(f"  Found a QOS with MaxTRESPerUser: gres/gpu={limit_gpu}")
-                        if over_by > 0:
-                            print(f"  You would exceed this limit by {over_by} GPUs.")
-                        else:
-                            print("  (Warning: The active QOS might be different from this detected one.)")
-            except Exception:
-                pass
+            # Try sacctmgr for exact limit (only queried when it is installed)
+            sacctmgr_out = sacctmgr_future.result() if sacctmgr_future else ""
+            # Output format: Name|MaxTRESPerUser
+            # We need to find the relevant line. Since we don't know which QOS, we might look for any that has GPU limit?
+            # The bash script just grep gpu.
+            # Let's try to extract any gpu limit
+            if sacctmgr_out:
+                gpu_limits = _QOS_GPU_LIMIT_RE.findall(sacctmgr_out)
+                if gpu_limits:
+                    limit_gpu = int(gpu_limits[0]) # Start with the first one found, better than nothing
+                    over_by = total_if_run - limit_gpu
+                    print(colored("  [sacctmgr Estimate]", "cyan"))
+                    print(f"  Found a QOS with MaxTRESPerUser: gres/gpu={limit_gpu}")
+                    if over_by > 0:
+                        print(f"  You would exceed this limit by {over_by} GPUs.")
+                    else:
+                        print("  (Warning: The active QOS might be different from this detected one.)")
         
         if not found_reason and "QOSMAXGRESPERUSER" not in reason_upper:
              print("Please check 'scontrol show job' for more details.")
-             print(run_command(["scontrol", "show", "job", str(job_id)]))
+             print(_scontrol_show_job(str(job_id)))
 
     elif job_state_short == "CG":
         print("Job is COMPLETING.")
@@ -493,21 +623,47 @@ def analyze_job(job_id):
         
     else:
         print(f"Job state: {job_state_short}")
-        print(run_command(["scontrol", "show", "job", str(job_id)]))
+        print(_scontrol_show_job(str(job_id)))
 
     print()
     print(colored("=" * 20, "cyan"))
 
 
+@functools.lru_cache(maxsize=None)
+def _bold_affixes(color):
+    """The (prefix, suffix) escape codes colored(..., attrs=["bold"]) adds for ``color``."""
+    prefix, _, suffix = colored("\0", color, attrs=["bold"]).partition("\0")
+    return prefix, suffix
+
+
+def _bold(text, color):
+    prefix, suffix = _bold_affixes(color)
+    return f"{prefix}{text}{suffix}"
+
+
+@functools.lru_cache(maxsize=64)
+def color_job_state(state):
+    """
+    Color job states based on their value. A queue holds only a handful of
+    distinct states, so each one is formatted once.
+    """
+    state_lower = state.lower()
+    if 'r' in state_lower:  # Running
+        return _bold(state, 'green')
+    elif 'pd' in state_lower:  # Pending
+        return _bold(state, 'yellow')
+    elif 'cg' in state_lower:  # Completing
+        return _bold(state, 'blue')
+    elif 'f' in state_lower or 'fail' in state_lower:  # Failed
+        return _bold(state, 'red')
+    else:  # Other states
+        return _bold(state, 'cyan')
+
+
 def _render_job_table(titles, rows, title=None):
-    """Render a list of pre-built rows as an AsciiTable."""
-    table = AsciiTable([titles] + rows)
-    for i in range(len(titles)):
-        table.justify_columns[i] = 'left'
-    table.justify_columns[0] = 'right'  # Right-align JobID for better readability
-    if title:
-        table.title = title
-    print(table.table)
+    """Render a list of pre-built rows as a table."""
+    # Right-align JobID for better readability
+    print(render_table([titles] + rows, justify={0: "right"}, title=title))
 
 
 def show_squeue(filter_mode="all"):
@@ -530,28 +686,22 @@ def show_squeue(filter_mode="all"):
         # Fallback if group info fails
         user = os.environ.get('USER', 'unknown')
         gr_mem = []
+    # Checked once per queue row, so make membership a hash lookup
+    my_users = frozenset(gr_mem) | {user}
 
     # Execute the `squeue` command and format the output for parsing
-    # Added %l for time limit to calculate remaining time
-    cmd = ['squeue', '--noheader', '-o', '%i|%P|%j|%u|%T|%M|%l|%D|%R']
+    # Added %l for time limit to calculate remaining time, and %C|%m|%b
+    # (CPUs, memory, GPUs per node) so resources need no scontrol per job
+    cmd = ['squeue', '--noheader', '-o', '%i|%P|%j|%u|%T|%M|%l|%D|%R|%C|%m|%b']
     try:
-        output = subprocess.check_output(cmd, stderr=subprocess.PIPE, text=True).strip()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
     except FileNotFoundError:
         print("Command 'squeue' not found. Please ensure SLURM is installed and added to PATH.")
         return
-    except subprocess.CalledProcessError as e:
-        print(f"Error while executing squeue: {e.stderr.strip()}")
-        return
     except Exception as e:
         print(f"Unexpected error while executing squeue: {e}")
         return
 
-    # Parse the output into lines
-    lines = output.split('\n')
-    if not lines or len(lines) == 1 and not lines[0].strip():
-        print("No jobs in the queue.")
-        return
-
     # Define table headers - added "Remaining" and "Resources" columns
     titles = ["JobID", "Partition", "Name", "User", "State", "Time", "Remaining", "Resources", "Nodes", "NodeList"]
 
@@ -561,59 +711,82 @@ def show_squeue(filter_mode="all"):
     all_rows = []
     gpu_rows = []
     cpu_rows = []
-    for line in lines:
-        parts = line.split('|')
-        if len(parts) < 9:
-            continue  # Skip incomplete lines
-
-        job_id = parts[0].strip()
-        partition = parts[1].strip()
-        job_name = truncate_name(parts[2].strip(), MAX_NAME_LENGTH)
-        username = parts[3].strip()
-        state = parts[4].strip()
-        run_time = parts[5].strip()
-        time_limit = parts[6].strip()
-        node_count = parts[7].strip()
-        nodelist = parts[8].strip()
-
-        # Calculate remaining time
-        elapsed_mins = parse_slurm_time(run_time)
-        limit_mins = parse_slurm_time(time_limit)
-
-        if elapsed_mins is not None and limit_mins is not None:
-            remaining_mins = limit_mins - elapsed_mins
-            remaining_time = format_time_remaining(remaining_mins)
-        else:
-            remaining_time = "N/A"
-
-        # Get resource information (CPU/Memory/GPU) and the GPU count for filtering
-        resources, gpu_count = get_job_resources(job_id)
+    gpu_counts = []  # per row in all_rows; None until known
+    # Jobs whose GPUs squeue's %b does not show: {job ID: (row index, cpus, memory)}
+    unresolved = {}
+    # The user's own pending jobs, in the PENDING_SQUEUE_FORMAT layout
+    # analyze_pending_job_brief expects, so they need no second squeue.
+    my_pending = {}
+    line_count = 0
+    with proc:
+        # csv splits each line in C as squeue streams it. Without a width in
+        # the format squeue pads nothing, so the fields need no stripping;
+        # QUOTE_NONE keeps quotes in job names literal.
+        for parts in csv.reader(proc.stdout, delimiter='|', quoting=csv.QUOTE_NONE):
+            if not parts:
+                continue
+            line_count += 1
+            if len(parts) < 12:
+                continue  # Skip incomplete lines
+
+            (job_id, partition, job_name, username, state, run_time, time_limit,
+             node_count, nodelist, cpus, memory, tres_per_node) = parts[:12]
+            if username == user and state == "PENDING":
+                my_pending[job_id] = [job_id, partition, job_name, state, run_time, time_limit,
+                                      node_count, nodelist, cpus, memory, tres_per_node]
+            raw_job_id = job_id
+            job_name = truncate_name(job_name, MAX_NAME_LENGTH)
+
+            # Calculate remaining time
+            elapsed_mins = parse_slurm_time(run_time)
+            limit_mins = parse_slurm_time(time_limit)
+
+            if elapsed_mins is not None and limit_mins is not None:
+                remaining_mins = limit_mins - elapsed_mins
+                remaining_time = format_time_remaining(remaining_mins)
+            else:
+                remaining_time = "N/A"
+
+            # Resource information (CPU/Memory/GPU) and the GPU count for filtering
+            cpus = int(cpus) if cpus.isdigit() else 0
+            gpu_count = squeue_gpu_count(tres_per_node, node_count)
+            resources = format_resources(cpus, memory, gpu_count or 0)
+
+            # Highlight jobs belonging to the current user or user's group
+            mygroup = username in my_users
+            if mygroup:
+                username = _bold(username, 'yellow')
+                job_id = _bold(job_id, 'yellow')
+            else:
+                job_id = _bold(job_id, 'white')
+
+            state = color_job_state(state)
+
+            row = [job_id, partition, job_name, username, state, run_time, remaining_time, resources, node_count, nodelist]
+            if gpu_count is None:
+                unresolved[raw_job_id] = (len(all_rows), cpus, memory)
+            all_rows.append(row)
+            gpu_counts.append(gpu_count)
+        error = proc.stderr.read()
+    if proc.returncode:
+        print(f"Error while executing squeue: {error.strip()}")
+        return
+    if not line_count:
+        print("No jobs in the queue.")
+        return
 
-        # Highlight jobs belonging to the current user or user's group
-        mygroup = (username == user or username in gr_mem)
-        if mygroup:
-            username = colored(username, 'yellow', attrs=['bold'])
-            job_id = colored(job_id, 'yellow', attrs=['bold'])
-        else:
-            job_id = colored(job_id, 'white', attrs=['bold'])
-
-        # Color job states based on their value
-        state_lower = state.lower()
-        if 'r' in state_lower:  # Running
-            state = colored(state, 'green', attrs=['bold'])
-        elif 'pd' in state_lower:  # Pending
-            state = colored(state, 'yellow', attrs=['bold'])
-        elif 'cg' in state_lower:  # Completing
-            state = colored(state, 'blue', attrs=['bold'])
-        elif 'f' in state_lower or 'fail' in state_lower:  # Failed
-            state = colored(state, 'red', attrs=['bold'])
-        else:  # Other states
-            state = colored(state, 'cyan', attrs=['bold'])
-
-        # Add the row to the appropriate bucket(s)
-        row = [job_id, partition, job_name, username, state, run_time, remaining_time, resources, node_count, nodelist]
-        all_rows.append(row)
-        if gpu_count > 0:
+    # Jobs may also request GPUs per job or per task, which only scontrol
+    # shows; look those jobs up, and only those.
+    records = get_jobs_scontrol(unresolved)
+    for job_id, (index, cpus, memory) in unresolved.items():
+        gpu_count = parse_gpu_count_from_scontrol(records.get(job_id, ""))
+        gpu_counts[index] = gpu_count
+        if gpu_count:
+            all_rows[index][7] = format_resources(cpus, memory, gpu_count)
+
+    # Add each row to the appropriate bucket
+    for row, gpu_count in zip(all_rows, gpu_counts):
+        if gpu_count:
             gpu_rows.append(row)
         else:
             cpu_rows.append(row)
@@ -644,16 +817,24 @@ def show_squeue(filter_mode="all"):
     else:  # "all"
         _render_job_table(titles, all_rows)
 
-    # Automatically analyze the current user's pending jobs
-    pending_jobs = get_user_pending_jobs(user)
-    if pending_jobs:
+    # Automatically analyze the current user's pending jobs, reusing the
+    # scontrol records fetched above and counting running GPUs once.
+    if my_pending:
+        user_gpu_running = None
+        if any("QOSMAXGRESPERUSER" in parts[7].upper() for parts in my_pending.values()):
+            user_gpu_running = get_user_gpu_running(user)
         print()
         print(colored("=" * 60, "cyan"))
-        print(colored(f"  Your Pending Jobs Analysis ({len(pending_jobs)} job(s))", "cyan", attrs=["bold"]))
+        print(colored(f"  Your Pending Jobs Analysis ({len(my_pending)} job(s))", "cyan", attrs=["bold"]))
         print(colored("=" * 60, "cyan"))
-        for job_id in pending_jobs:
+        for job_id, parts in my_pending.items():
             print()
-            analyze_pending_job_brief(job_id, user)
+            analyze_pending_job_brief(
+                job_id, user,
+                squeue_parts=parts,
+                scontrol_record=records.get(job_id),
+                user_gpu_running=user_gpu_running,
+            )
 
 
 def print_help():
@@ -0,0 +1,142 @@
+"""Optional slurmrestd client used instead of the sinfo/sacctmgr CLIs."""
+
+import json
+import os
+import threading
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import http.client
+    import urllib.parse
+
+REST_URL_ENV = "WRAPSLURM_SLURMRESTD_URL"
+REST_VERSION_ENV = "WRAPSLURM_SLURMRESTD_VERSION"
+DEFAULT_API_VERSION = "v0.0.40"
+REQUEST_TIMEOUT = 2.0
+
+# (partition, cpus per node, memory in MB, gres, max time)
+PartitionRow = Tuple[str, int, int, str, Optional[str]]
+
+
+class SlurmRestError(RuntimeError):
+    """Raised when slurmrestd cannot be reached or returns an unusable reply."""
+
+
+_lock = threading.Lock()
+_connection: Optional["http.client.HTTPConnection"] = None
+
+
+def rest_url() -> Optional[str]:
+    """Return the configured slurmrestd base URL, or None to use the CLIs."""
+    return os.environ.get(REST_URL_ENV) or None
+
+
+def _api_version() -> str:
+    return os.environ.get(REST_VERSION_ENV) or DEFAULT_API_VERSION
+
+
+def _get_connection(url: "urllib.parse.SplitResult") -> "http.client.HTTPConnection":
+    # One keep-alive connection per process, shared by every query.
+    global _connection
+    if _connection is None:
+        import http.client
+
+        if url.scheme == "https":
+            _connection = http.client.HTTPSConnection(url.netloc, timeout=REQUEST_TIMEOUT)
+        elif url.scheme == "http":
+            _connection = http.client.HTTPConnection(url.netloc, timeout=REQUEST_TIMEOUT)
+        else:
+            raise SlurmRestError(f"Unsupported {REST_URL_ENV} scheme: {url.scheme!r}")
+    return _connection
+
+
+def _close_connection() -> None:
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def get_json(path: str, query: Optional[Dict[str, str]] = None) -> Dict[str, object]:
+    """GET ``path`` relative to the configured base URL and decode the JSON reply."""
+    base = rest_url()
+    if base is None:
+        raise SlurmRestError(f"{REST_URL_ENV} is not set")
+    # Deferred: only needed when slurmrestd is configured.
+    import http.client
+    import urllib.parse
+
+    url = urllib.parse.urlsplit(base)
+    target = url.path.rstrip("/") + path
+    if query:
+        target += "?" + urllib.parse.urlencode(query)
+    headers = {"Accept": "application/json", "Connection": "keep-alive"}
+    token = os.getenv("SLURM_JWT")
+    if token:
+        headers["X-SLURM-USER-NAME"] = os.getenv("USER") or ""
+        headers["X-SLURM-USER-TOKEN"] = token
+    with _lock:
+        try:
+            connection = _get_connection(url)
+            connection.request("GET", target, headers=headers)
+            response = connection.getresponse()
+            body = response.read()
+        except (OSError, http.client.HTTPException) as exc:
+            _close_connection()
+            raise SlurmRestError(f"slurmrestd request to {target} failed: {exc}")
+    if response.status != 200:
+        raise SlurmRestError(f"slurmrestd returned HTTP {response.status} for {target}")
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise SlurmRestError(f"slurmrestd returned invalid JSON for {target}")
+    if not isinstance(data, dict):
+        raise SlurmRestError(f"slurmrestd returned an unexpected reply for {target}")
+    return data
+
+
+def _number(value: object) -> Optional[int]:
+    """Unwrap the ``{"set", "infinite", "number"}`` objects used since v0.0.40."""
+    if isinstance(value, dict):
+        if value.get("infinite") or not value.get("set", True):
+            return None
+        value = value.get("number")
+    return value if isinstance(value, int) else None
+
+
+def _format_minutes(minutes: int) -> str:
+    """Format a time limit in minutes the way sinfo's %l does."""
+    days, minutes = divmod(minutes, 24 * 60)
+    hours, minutes = divmod(minutes, 60)
+    if days:
+        return f"{days}-{hours:02d}:{minutes:02d}:00"
+    return f"{hours}:{minutes:02d}:00"
+
+
+def partition_rows() -> List[PartitionRow]:
+    """Return one row per (partition, node), like ``sinfo --format=%R|%c|%m|%G|%l``."""
+    version = _api_version()
+    max_times: Dict[str, Optional[str]] = {}
+    for partition in get_json(f"/slurm/{version}/partitions").get("partitions") or ():
+        minutes = _number((partition.get("maximums") or {}).get("time"))
+        max_times[partition.get("name")] = _format_minutes(minutes) if minutes is not None else None
+
+    rows: List[PartitionRow] = []
+    for node in get_json(f"/slurm/{version}/nodes").get("nodes") or ():
+        cpus = _number(node.get("cpus")) or 1
+        memory_mb = _number(node.get("real_memory")) or 0
+        gres = node.get("gres") or ""
+        for name in node.get("partitions") or ():
+            rows.append((name, cpus, memory_mb, gres, max_times.get(name)))
+    return rows
+
+
+def default_account(user: Optional[str]) -> Optional[str]:
+    """Return the first account associated with ``user``, if any."""
+    query = {"user": user} if user else None
+    data = get_json(f"/slurmdb/{_api_version()}/associations", query)
+    for association in data.get("associations") or ():
+        account = association.get("account")
+        if account:
+            return account
+    return None
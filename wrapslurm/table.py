@@ -0,0 +1,66 @@
+"""Plain ASCII table rendering in the style of terminaltables' AsciiTable."""
+
+import re
+from typing import Dict, List, Optional, Sequence
+
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+def visible_width(text: str) -> int:
+    """Terminal columns taken by ``text``, ignoring colour codes."""
+    plain = _ANSI_RE.sub("", text)
+    if len(plain.encode("utf-8")) == len(plain):  # pure ASCII
+        return len(plain)
+    import unicodedata  # only needed for non-ASCII cells
+
+    return sum(2 if unicodedata.east_asian_width(char) in "FW" else 1 for char in plain)
+
+
+def render_table(
+    rows: Sequence[Sequence[object]],
+    justify: Optional[Dict[int, str]] = None,
+    title: Optional[str] = None,
+) -> str:
+    """
+    Render ``rows`` (the first one is the heading) as an ASCII table.
+
+    ``justify`` maps column indexes to "left" (default), "right" or "center".
+    """
+    cells = [[str(cell) for cell in row] for row in rows]
+    if not cells:
+        return ""
+    justify = justify or {}
+    widths = [0] * max(len(row) for row in cells)
+    cell_widths: List[List[int]] = []
+    for row in cells:
+        row_widths = [visible_width(cell) for cell in row]
+        cell_widths.append(row_widths)
+        for index, width in enumerate(row_widths):
+            if width > widths[index]:
+                widths[index] = width
+
+    border = "+" + "+".join("-" * (width + 2) for width in widths) + "+"
+
+    def render_row(row: List[str], row_widths: List[int]) -> str:
+        padded = []
+        for index, width in enumerate(widths):
+            cell = row[index] if index < len(row) else ""
+            gap = width - (row_widths[index] if index < len(row) else 0)
+            how = justify.get(index, "left")
+            if how == "right":
+                padded.append(" " * gap + cell)
+            elif how == "center":
+                padded.append(" " * (gap // 2) + cell + " " * (gap - gap // 2))
+            else:
+                padded.append(cell + " " * gap)
+        return "| " + " | ".join(padded) + " |"
+
+    top = border
+    if title and visible_width(title) <= len(border) - 2:
+        top = "+" + title + border[1 + visible_width(title):]
+    lines = [top, render_row(cells[0], cell_widths[0])]
+    if len(cells) > 1:
+        lines.append(border)
+        lines.extend(render_row(row, widths_) for row, widths_ in zip(cells[1:], cell_widths[1:]))
+    lines.append(border)
+    return "\n".join(lines)
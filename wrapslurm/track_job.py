@@ -1,5 +1,4 @@
 import os
-import glob
 import subprocess
 import argparse
 import getpass
@@ -32,41 +31,52 @@ def get_running_job_ids():
         user = getpass.getuser()
         output = subprocess.check_output(
             ["squeue", "-u", user, "-t", "R", "-h", "-o", "%i|%j"],
-            stderr=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             text=True
-        ).strip()
-        if not output:
-            return []
+        )
         
         jobs = []
-        for line in output.split('\n'):
+        for line in output.splitlines():
             if '|' in line:
-                parts = line.split('|')
-                job_id = parts[0].strip()
-                job_name = parts[1].strip() if len(parts) > 1 else ""
-                jobs.append((job_id, job_name))
+                # Only the first '|' separates fields; job names may contain more
+                job_id, _, job_name = line.partition('|')
+                jobs.append((job_id.strip(), job_name.strip()))
         return jobs
     except (subprocess.CalledProcessError, FileNotFoundError):
         return []
 
 
+def _scan_logs(report_dir):
+    """
+    Yield the DirEntry of each *.out file in report_dir, reading the directory
+    once; callers stat only the entries they keep.
+    """
+    try:
+        entries = os.scandir(report_dir)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            name = entry.name
+            # Same files as glob("*.out"), which skips hidden files
+            if name.endswith(".out") and not name.startswith("."):
+                yield entry
+
+
 def find_logs_matching_id(job_id, report_dir="./slurm-report"):
     """
     Find log files that contain the given job_id in their filename.
     Uses partial matching instead of exact filename match.
     """
     try:
-        # Get all log files in the directory
-        log_files = glob.glob(os.path.join(report_dir, "*.out"))
-        if not log_files:
-            return []
-        
-        # Filter logs that contain the job_id in their filename
-        matching = [f for f in log_files if job_id in os.path.basename(f)]
-        
-        # Sort by modification time (newest first)
-        matching.sort(key=os.path.getmtime, reverse=True)
-        return matching
+        # Logs that contain the job_id in their filename, newest first
+        matching = [
+            (entry.stat().st_mtime, entry.path)
+            for entry in _scan_logs(report_dir)
+            if job_id in entry.name
+        ]
+        matching.sort(reverse=True)
+        return [path for _, path in matching]
     except Exception:
         return []
 
@@ -76,14 +86,13 @@ def find_latest_log(report_dir="./slurm-report"):
     Find the latest log file in the specified directory.
     """
     try:
-        # Get a list of all log files in the directory
-        log_files = glob.glob(os.path.join(report_dir, "*.out"))
-        if not log_files:
+        latest = max(
+            ((entry.stat().st_mtime, entry.path) for entry in _scan_logs(report_dir)),
+            default=None,
+        )
+        if latest is None:
             raise FileNotFoundError(f"No log files found in {report_dir}")
-
-        # Sort by modification time and return the latest
-        latest_log = max(log_files, key=os.path.getmtime)
-        return latest_log
+        return latest[1]
     except FileNotFoundError as e:
         print(f"Error: {e}")
         exit(1)